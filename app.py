@@ -1,4 +1,14 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file
+from flask import (
+    Flask,
+    render_template,
+    request,
+    redirect,
+    url_for,
+    flash,
+    send_file,
+    jsonify,
+    Response,
+)
 from flask_bcrypt import Bcrypt
 from flask_login import (
     LoginManager,
@@ -7,15 +17,28 @@ from flask_login import (
     login_required,
     current_user,
 )
-from models import db, User, Todo, Schedule
-from parser import ScheduleParser
+from models import (
+    db,
+    User,
+    Todo,
+    Schedule,
+    OCRJob,
+    TASK_LIST_COLUMNS,
+    SCHEDULE_LIST_COLUMNS,
+)
+from debug_capture import DebugCapture
+from jobs import OCRJobQueue, QueueFullError
+from ocr_metrics import StageHistograms, render_gauges, server_timing_header
+from upload_store import UploadStore, keys_from
 from datetime import datetime, timedelta, time
 from ics import Calendar, Event
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 from werkzeug.middleware.proxy_fix import ProxyFix
 import os
 import io
 import re
+from time import perf_counter
 import pytz
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
@@ -23,30 +46,128 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import json
 import config
+import database
+import migrations
+from pagination import keyset_page, nulls_sort_first
+
+# Native math libraries read these when they're first loaded, which happens
+# later, with the OCR model
+for thread_var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+    os.environ.setdefault(thread_var, str(config.OCR_THREADS))
 
 
 app = Flask(__name__)
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
 # Configure database
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///tasks.db"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["SECRET_KEY"] = "doors"
 app.config["UPLOAD_FOLDER"] = "uploads"
 app.config["ALLOWED_EXTENSIONS"] = {"png", "jpg", "jpeg", "gif"}
+app.config["MAX_CONTENT_LENGTH"] = config.MAX_UPLOAD_MB * 1024 * 1024
 
 # Initialize db with this Flask app
-db.init_app(app)
-with app.app_context():
-    db.create_all()
+database.init_app(
+    app,
+    db,
+    config.DATABASE_URL,
+    busy_timeout_ms=config.SQLITE_BUSY_TIMEOUT_MS,
+    mmap_size=config.SQLITE_MMAP_MB * 1024 * 1024,
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+    pool_timeout=config.DB_POOL_TIMEOUT,
+    pool_recycle=config.DB_POOL_RECYCLE,
+)
+if config.DB_AUTO_MIGRATE:
+    with app.app_context():
+        migrations.upgrade(db.engine)
 bcrypt = Bcrypt(app)
 login_manager = LoginManager(app)
 login_manager.login_view = "login"
 login_manager.login_message_category = "info"
 
-print("Loading OCR model (this may take a moment)...")
-schedule_parser = ScheduleParser()
-print("OCR Model loaded. Starting server.")
+if config.OCR_SERVER_URL:
+    from ocr_client import OCRClient
+
+    print(f"Using OCR server at {config.OCR_SERVER_URL}")
+    schedule_parser = OCRClient(config.OCR_SERVER_URL)
+else:
+    from ocr_cache import OCRCache
+    from parser import ScheduleParser
+
+    ocr_cache = OCRCache(
+        config.OCR_CACHE_DIR, max_bytes=config.OCR_CACHE_MAX_MB * 1024 * 1024
+    )
+    schedule_parser = ScheduleParser(
+        warm_up=config.OCR_WARM_UP,
+        cache=ocr_cache,
+        grid_fast_path=config.OCR_GRID_FAST_PATH,
+        quantize=config.OCR_QUANTIZE,
+        threads=config.OCR_THREADS,
+        interop_threads=config.OCR_INTEROP_THREADS,
+        adaptive=config.OCR_ADAPTIVE,
+        min_confidence=config.OCR_MIN_CONFIDENCE,
+        vocabulary=config.OCR_VOCABULARY,
+        tiling=config.OCR_TILING,
+        tile_workers=config.OCR_TILE_WORKERS,
+    )
+
+ocr_stage_metrics = StageHistograms() if config.OCR_TIMING else None
+
+debug_capture = DebugCapture(
+    config.DEBUG_CAPTURE_DIR,
+    sample_rate=config.DEBUG_CAPTURE_RATE,
+    keep=config.DEBUG_CAPTURE_KEEP,
+)
+
+upload_store = UploadStore(
+    config.UPLOAD_STORE_DIR, grace_seconds=config.UPLOAD_GC_GRACE_SECONDS
+)
+
+ocr_jobs = OCRJobQueue(
+    schedule_parser,
+    max_workers=config.OCR_MAX_WORKERS,
+    max_pending=config.OCR_MAX_PENDING,
+    metrics=ocr_stage_metrics,
+    upload_store=upload_store,
+    debug_capture=debug_capture,
+    job_timeout=config.OCR_JOB_TIMEOUT,
+)
+ocr_jobs.init_app(app)
+
+
+def upload_extension(filename):
+    extension = os.path.splitext(secure_filename(filename))[1].lstrip(".").lower()
+    return extension if extension in app.config["ALLOWED_EXTENSIONS"] else "img"
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    flash(
+        f"That upload is too large. Screenshots can add up to at most "
+        f"{config.MAX_UPLOAD_MB} MB.",
+        "danger",
+    )
+    return redirect(url_for("index"))
+
+
+@app.cli.command("gc-uploads")
+def gc_uploads():
+    """Delete uploaded screenshots no schedule uses any more"""
+    stats = upload_store.collect_garbage(legacy_dir=app.config["UPLOAD_FOLDER"])
+    print(
+        f"Kept {stats['kept']} stored screenshots, removed {stats['removed']} "
+        f"(+{stats['legacy_removed']} old uploads), "
+        f"freed {stats['freed_bytes'] / (1024 * 1024):.1f} MB"
+    )
+
+
+@app.cli.command("db-upgrade")
+def db_upgrade():
+    """Bring the database schema up to date"""
+    applied = migrations.upgrade(db.engine)
+    if not applied:
+        print("Database is up to date")
 
 
 @login_manager.user_loader
@@ -154,40 +275,66 @@ def index():
 
         task_content = request.form["content"].strip()
         due_date_str = request.form.get("due")
-        file = request.files.get("screenshot")
+        files = [f for f in request.files.getlist("screenshot") if f.filename != ""]
         start_date_str = request.form.get("schedule_start_date")
 
-        if file and file.filename != "" and start_date_str:
+        if files and start_date_str:
 
-            filename = secure_filename(file.filename)
-            os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
-            save_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-            file.save(save_path)
+            if len(files) > config.MAX_SCREENSHOTS_PER_UPLOAD:
+                flash(
+                    f"Please upload at most {config.MAX_SCREENSHOTS_PER_UPLOAD} "
+                    "screenshots at a time.",
+                    "danger",
+                )
+                return redirect(url_for("index"))
 
             try:
-
-                parsed_schedule = schedule_parser.parse_schedule(save_path, debug=True)
-
                 week_start = datetime.strptime(start_date_str, "%Y-%m-%d").date()
+            except ValueError:
+                flash("Invalid schedule start date.", "danger")
+                return redirect(url_for("index"))
+
+            # Parsed straight from memory, the store keeps a copy by content
+            read_start = perf_counter()
+            images = [f.read() for f in files]
+            read_ms = round((perf_counter() - read_start) * 1000, 1)
+
+            store_start = perf_counter()
+            keys = [
+                upload_store.put(image, upload_extension(f.filename))
+                for f, image in zip(files, images)
+            ]
+            filename = ",".join(keys)
+            store_ms = round((perf_counter() - store_start) * 1000, 1)
 
-                print(f"Week starts on: {week_start} ({week_start.strftime('%A')})")
-
-                new_schedule = Schedule(
-                    user_id=current_user.id,
-                    week_start_date=week_start,
-                    image_filename=filename,
-                    parsed_data=parsed_schedule,
+            try:
+                submit_start = perf_counter()
+                job_id = ocr_jobs.submit(current_user.id, images, filename, week_start)
+                submit_ms = round((perf_counter() - submit_start) * 1000, 1)
+            except QueueFullError:
+                upload_store.abandon(keys)
+                flash(
+                    "Too many schedules are being processed right now. "
+                    "Please try again in a minute.",
+                    "danger",
                 )
-                db.session.add(new_schedule)
-                db.session.commit()
+                return redirect(url_for("index"))
 
-                flash("Schedule parsed and saved successfully!", "success")
-                return redirect(url_for("view_schedule", schedule_id=new_schedule.id))
-
-            except Exception as e:
-                flash(f"Error parsing image: {e}", "danger")
+            if schedule_parser.is_ready():
+                flash("Schedule uploaded! Reading it now...", "info")
+            else:
+                flash(
+                    "Schedule uploaded! The schedule reader is still starting up, "
+                    "so this one may take a little longer.",
+                    "info",
+                )
 
-            return redirect(url_for("index"))
+            response = redirect(url_for("schedule_job", job_id=job_id))
+            if ocr_stage_metrics is not None:
+                response.headers["Server-Timing"] = server_timing_header(
+                    {"read": read_ms, "store": store_ms, "enqueue": submit_ms}
+                )
+            return response
 
         elif task_content:
             if due_date_str:
@@ -215,24 +362,40 @@ def index():
         sort = request.args.get("sort", "created")
         order = request.args.get("order", "asc")
 
-        query = Todo.query.filter_by(user_id=current_user.id)
+        query = Todo.query.filter_by(user_id=current_user.id).with_entities(
+            *TASK_LIST_COLUMNS
+        )
 
         if sort == "due":
-            query = query.order_by(
-                Todo.due.desc() if order == "desc" else Todo.due.asc()
-            )
+            column = Todo.due
         elif sort == "completed":
-            query = query.order_by(
-                Todo.completed.desc() if order == "desc" else Todo.completed.asc()
-            )
+            column = Todo.completed
         else:
-            query = query.order_by(
-                Todo.date_created.desc() if order == "desc" else Todo.date_created.asc()
+            column = Todo.date_created
+
+        # Pages are read by seeking the (user_id, column) index from a
+        # cursor, so a page costs the same however many tasks there are
+        try:
+            page = keyset_page(
+                query,
+                column,
+                Todo.id,
+                descending=order == "desc",
+                page_size=config.TASKS_PAGE_SIZE,
+                after=request.args.get("after"),
+                before=request.args.get("before"),
+                nulls_first=nulls_sort_first(db.engine.dialect),
             )
+        except ValueError:
+            return redirect(url_for("index", sort=sort, order=order))
 
-        tasks = query.all()
         return render_template(
-            "index.html", tasks=tasks, sort=sort, order=order, current_time=current_time
+            "index.html",
+            tasks=page.items,
+            page=page,
+            sort=sort,
+            order=order,
+            current_time=current_time,
         )
 
 
@@ -261,6 +424,71 @@ def view_schedule(schedule_id):
     )
 
 
+@app.route("/schedule/jobs/<job_id>")
+@login_required
+def schedule_job(job_id):
+    """Waiting page that polls the job status until the schedule is ready"""
+    job = OCRJob.query.filter_by(id=job_id, user_id=current_user.id).first_or_404()
+    ocr_jobs.expire_if_stale(job)
+
+    if job.status == "done":
+        return redirect(url_for("view_schedule", schedule_id=job.schedule_id))
+
+    return render_template(
+        "schedule_job.html", job=job, poll_limit_seconds=config.OCR_JOB_TIMEOUT
+    )
+
+
+@app.route("/schedule/jobs/<job_id>/status")
+@login_required
+def schedule_job_status(job_id):
+    """JSON status of an OCR job, polled by schedule_job.html"""
+    job = OCRJob.query.filter_by(id=job_id, user_id=current_user.id).first_or_404()
+    ocr_jobs.expire_if_stale(job)
+
+    status = {
+        "id": job.id,
+        "status": job.status,
+        "error": job.error,
+        "timings": job.timings,
+    }
+    if job.status == "done":
+        status["schedule_url"] = url_for("view_schedule", schedule_id=job.schedule_id)
+
+    response = jsonify(status)
+    if job.timings and job.timings.get("stages"):
+        # The OCR ran after the upload response was sent, so its breakdown
+        # is reported on the poll that sees the job finish
+        response.headers["Server-Timing"] = server_timing_header(
+            job.timings["stages"]
+        )
+    return response
+
+
+@app.route("/ocr/status")
+@login_required
+def ocr_status():
+    """OCR readiness and cache hit/miss counters"""
+    return jsonify(schedule_parser.status())
+
+
+@app.route("/metrics")
+def metrics():
+    """OCR stage latency histograms and queue/cache gauges for scraping"""
+    body = ocr_stage_metrics.render_prometheus() if ocr_stage_metrics else ""
+    body += render_gauges({"jobs_pending": ocr_jobs.pending})
+
+    status = schedule_parser.status()
+    cache = status.pop("cache", None) or {}
+    model = status.pop("model", None) or {}
+    body += render_gauges(status)
+    body += render_gauges(cache, prefix="ocr_cache_")
+    body += render_gauges(model, prefix="ocr_model_")
+    body += render_gauges(debug_capture.stats, prefix="ocr_debug_capture_")
+
+    return Response(body, mimetype="text/plain")
+
+
 @app.route("/schedule/<int:schedule_id>/export")
 @login_required
 def export_ics(schedule_id):
@@ -669,6 +897,7 @@ def schedules_list():
     """Show all schedules for the current user"""
     schedules = (
         Schedule.query.filter_by(user_id=current_user.id)
+        .with_entities(*SCHEDULE_LIST_COLUMNS)
         .order_by(Schedule.created_at.desc())
         .all()
     )
@@ -682,15 +911,17 @@ def delete_schedule(schedule_id):
     schedule = Schedule.query.filter_by(
         id=schedule_id, user_id=current_user.id
     ).first_or_404()
+    unused = upload_store.release(keys_from(schedule.image_filename))
     db.session.delete(schedule)
     db.session.commit()
+    upload_store.discard(unused)
     flash("Schedule deleted successfully", "info")
     return redirect(url_for("schedules_list"))
 
 
 if __name__ == "__main__":
     with app.app_context():
-        db.create_all()
+        migrations.upgrade(db.engine)
 
     port = int(os.environ.get("PORT", 5000))
     debug = os.environ.get("DEBUG", "False") == "True"
@@ -0,0 +1,208 @@
+"""
+Query plans and latency of the per-user list queries, before and after the
+index migration.
+
+Seeds a SQLite database shaped like an existing install (tables made by
+db.create_all() before the indexes existed) with --tasks task rows spread
+over --users users, plus schedules. It then runs the task list query for
+every sort order and the schedules list query, once before and once after
+migrations.upgrade():
+
+    python benchmarks/bench_db_indexes.py
+    python benchmarks/bench_db_indexes.py --tasks 200000 --samples 50
+
+Prints SQLite's EXPLAIN QUERY PLAN for each query and the mean time per
+query for random users. Exits with status 1 if, after the migration, any
+query still scans its table or sorts in a temporary b-tree.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import sqlalchemy as sa  # noqa: E402
+
+import database  # noqa: E402
+import migrations  # noqa: E402
+from models import db, Schedule, Todo  # noqa: E402
+
+NEW_INDEXES = [
+    "ix_todo_user_created",
+    "ix_todo_user_due",
+    "ix_todo_user_completed",
+    "ix_schedule_user_created",
+]
+
+
+def list_queries(user_id):
+    """
+    The queries index() and schedules_list() run, by name.
+    """
+    tasks = sa.select(Todo).filter_by(user_id=user_id)
+    queries = {}
+    for sort, column in (
+        ("created", Todo.date_created),
+        ("due", Todo.due),
+        ("completed", Todo.completed),
+    ):
+        queries[f"tasks by {sort}"] = tasks.order_by(column.asc())
+        queries[f"tasks by {sort} desc"] = tasks.order_by(column.desc())
+    queries["schedules"] = (
+        sa.select(Schedule)
+        .filter_by(user_id=user_id)
+        .order_by(Schedule.created_at.desc())
+    )
+    return queries
+
+
+def seed(engine, users, tasks, schedules):
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        # An install from before the migration: same tables, no indexes
+        for name in NEW_INDEXES:
+            connection.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+        # ...which has had the "create tables" migration's worth of schema
+        migrations.schema_migrations.create(connection, checkfirst=True)
+        connection.execute(
+            migrations.schema_migrations.insert().values(
+                version=1, description="create tables", applied_at=datetime.now()
+            )
+        )
+
+        connection.execute(
+            sa.text(
+                "INSERT INTO user (id, username, email, password_hash) "
+                "VALUES (:id, :username, :email, 'x')"
+            ),
+            [
+                {"id": i, "username": f"user{i}", "email": f"user{i}@example.com"}
+                for i in range(1, users + 1)
+            ],
+        )
+
+        rng = random.Random(0)
+        start = datetime(2024, 1, 1)
+        chunk = 50_000
+        for offset in range(0, tasks, chunk):
+            connection.execute(
+                Todo.__table__.insert(),
+                [
+                    {
+                        "content": f"task {i}",
+                        "completed": rng.randint(0, 1),
+                        "date_created": start + timedelta(minutes=i),
+                        "due": (start + timedelta(days=rng.randrange(365))).date()
+                        if rng.random() < 0.7
+                        else None,
+                        "user_id": rng.randint(1, users),
+                    }
+                    for i in range(offset, min(tasks, offset + chunk))
+                ],
+            )
+
+        connection.execute(
+            Schedule.__table__.insert(),
+            [
+                {
+                    "user_id": rng.randint(1, users),
+                    "week_start_date": (start + timedelta(weeks=i % 52)).date(),
+                    "image_filename": f"{i:040x}.png",
+                    "parsed_data": {"Mon": "9am - 5pm"},
+                    "created_at": start + timedelta(hours=i),
+                }
+                for i in range(schedules)
+            ],
+        )
+
+
+def query_plan(connection, statement):
+    sql = str(
+        statement.compile(
+            dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+        )
+    )
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+    return "; ".join(row[-1] for row in rows)
+
+
+def measure(engine, users, samples):
+    """
+    {query name: (plan, mean ms)} over samples random users.
+    """
+    rng = random.Random(1)
+    user_ids = [rng.randint(1, users) for _ in range(samples)]
+
+    results = {}
+    with engine.connect() as connection:
+        for name in list_queries(1):
+            times = []
+            for user_id in user_ids:
+                statement = list_queries(user_id)[name]
+                start = time.perf_counter()
+                connection.execute(statement).all()
+                times.append(time.perf_counter() - start)
+            plan = query_plan(connection, list_queries(user_ids[0])[name])
+            results[name] = (plan, statistics.mean(times) * 1000)
+    return results
+
+
+def uses_index(plan):
+    return "USING INDEX" in plan and "TEMP B-TREE" not in plan
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Index migration benchmark")
+    arg_parser.add_argument("--tasks", type=int, default=1_000_000)
+    arg_parser.add_argument("--users", type=int, default=10_000)
+    arg_parser.add_argument("--schedules", type=int, default=100_000)
+    arg_parser.add_argument("--samples", type=int, default=100)
+    args = arg_parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-db-"), "tasks.db")
+    engine = sa.create_engine(f"sqlite:///{path}")
+    database.set_sqlite_pragmas(engine)
+
+    start = time.perf_counter()
+    seed(engine, args.users, args.tasks, args.schedules)
+    print(
+        f"Seeded {args.tasks} tasks and {args.schedules} schedules for "
+        f"{args.users} users in {time.perf_counter() - start:.1f}s\n"
+    )
+
+    before = measure(engine, args.users, args.samples)
+
+    start = time.perf_counter()
+    migrations.upgrade(engine)
+    print(f"Migration took {time.perf_counter() - start:.1f}s\n")
+
+    after = measure(engine, args.users, args.samples)
+
+    print(f"{'query':<24}{'before ms':>10}{'after ms':>10}{'speedup':>9}")
+    for name, (_, before_ms) in before.items():
+        after_ms = after[name][1]
+        print(
+            f"{name:<24}{before_ms:>10.2f}{after_ms:>10.2f}"
+            f"{before_ms / after_ms:>8.1f}x"
+        )
+
+    print("\nQuery plans (before -> after):")
+    failed = []
+    for name in before:
+        print(f"  {name}\n    {before[name][0]}\n    {after[name][0]}")
+        if not uses_index(after[name][0]):
+            failed.append(name)
+
+    if failed:
+        print(f"\nFAIL: no index used for {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Memory and render time of the task and schedule list pages, loading full
+ORM objects versus selecting only the columns the templates show.
+
+Seeds a throwaway database with one user owning --rows tasks and --rows
+schedules (each with a week of parsed shifts), then times the query plus
+template render of each list both ways:
+
+    objects     Model.query ... .all(), what the routes did before
+    columns     .with_entities(*TASK_LIST_COLUMNS / SCHEDULE_LIST_COLUMNS)
+
+    python benchmarks/bench_list_projection.py
+    python benchmarks/bench_list_projection.py --rows 20000 --repeats 10
+
+The task list is one page (TASKS_PAGE_SIZE tasks), the schedules list is
+every schedule. Prints median milliseconds, peak traced memory and how many
+objects the session tracks for the page.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+directory = tempfile.mkdtemp(prefix="bench-lists-")
+# app.py configures itself from the environment on import; keep everything
+# it creates in the throwaway directory, have it create the tables and
+# don't load the OCR model
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'tasks.db')}"
+os.environ["OCR_WARM_UP"] = "False"
+os.environ["DB_AUTO_MIGRATE"] = "True"
+os.environ["OCR_CACHE_DIR"] = os.path.join(directory, "ocr_cache")
+os.environ["UPLOAD_STORE_DIR"] = os.path.join(directory, "store")
+os.environ["DEBUG_CAPTURE_DIR"] = os.path.join(directory, "debug")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from flask import render_template  # noqa: E402
+from flask_login import login_user  # noqa: E402
+
+import config  # noqa: E402
+from app import app  # noqa: E402
+from models import (  # noqa: E402
+    db,
+    Schedule,
+    SCHEDULE_LIST_COLUMNS,
+    TASK_LIST_COLUMNS,
+    Todo,
+    User,
+)
+from pagination import keyset_page, nulls_sort_first  # noqa: E402
+
+WEEK = {
+    "Mon": "9am - 5pm",
+    "Tue": "9am - 5pm",
+    "Wed": "Day Off",
+    "Thu": "12pm - 8:30pm",
+    "Fri": "12pm - 8:30pm",
+    "Sat": "6am - 2:30pm",
+    "Sun": "Day Off",
+}
+
+
+def seed(rows):
+    user = User(username="bench", email="bench@example.com", password_hash="x")
+    db.session.add(user)
+    db.session.flush()
+    start = datetime(2024, 1, 1)
+    db.session.execute(
+        Todo.__table__.insert(),
+        [
+            {
+                "content": f"task {i}",
+                "completed": int(i % 3 == 0),
+                "date_created": start + timedelta(minutes=i),
+                "due": date(2024, 1, 1) + timedelta(days=i % 365) if i % 2 else None,
+                "user_id": user.id,
+            }
+            for i in range(rows)
+        ],
+    )
+    db.session.execute(
+        Schedule.__table__.insert(),
+        [
+            {
+                "user_id": user.id,
+                "week_start_date": date(2024, 1, 1) + timedelta(weeks=i),
+                "image_filename": f"{i:064x}.png",
+                "parsed_data": WEEK,
+                "created_at": start + timedelta(hours=i),
+            }
+            for i in range(rows)
+        ],
+    )
+    db.session.commit()
+    return user.id
+
+
+def task_page(user_id, columns):
+    query = Todo.query.filter_by(user_id=user_id)
+    if columns:
+        query = query.with_entities(*TASK_LIST_COLUMNS)
+    page = keyset_page(
+        query,
+        Todo.date_created,
+        Todo.id,
+        page_size=config.TASKS_PAGE_SIZE,
+        nulls_first=nulls_sort_first(db.engine.dialect),
+    )
+    html = render_template(
+        "index.html",
+        tasks=page.items,
+        page=page,
+        sort="created",
+        order="asc",
+        current_time="",
+    )
+    return page.items, html
+
+
+def schedules(user_id, columns):
+    query = Schedule.query.filter_by(user_id=user_id)
+    if columns:
+        query = query.with_entities(*SCHEDULE_LIST_COLUMNS)
+    rows = query.order_by(Schedule.created_at.desc()).all()
+    return rows, render_template("schedules.html", schedules=rows)
+
+
+def measure(view, user_id, columns, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        view(user_id, columns)
+        times.append(time.perf_counter() - start)
+        db.session.expunge_all()
+
+    tracemalloc.start()
+    rows, _ = view(user_id, columns)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # Counted while the rows are still referenced, the map holds them weakly
+    tracked = len(db.session.identity_map)
+    del rows
+    db.session.expunge_all()
+    return statistics.median(times) * 1000, peak / 1024 / 1024, tracked
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="List page projections")
+    arg_parser.add_argument("--rows", type=int, default=5000)
+    arg_parser.add_argument("--repeats", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    with app.app_context():
+        user_id = seed(args.rows)
+        with app.test_request_context("/"):
+            login_user(db.session.get(User, user_id))
+
+            print(f"{args.rows} tasks and schedules, median of {args.repeats}\n")
+            print(f"{'list':<12}{'load':<10}{'ms':>9}{'peak MB':>10}{'tracked':>9}")
+            for name, view in (("tasks", task_page), ("schedules", schedules)):
+                for columns in (False, True):
+                    ms, peak, tracked = measure(view, user_id, columns, args.repeats)
+                    load = "columns" if columns else "objects"
+                    print(f"{name:<12}{load:<10}{ms:>9.2f}{peak:>10.2f}{tracked:>9}")
+
+
+if __name__ == "__main__":
+    main()
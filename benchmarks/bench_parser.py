@@ -0,0 +1,262 @@
+"""
+Stage-level benchmark for ScheduleParser on synthetic schedule images.
+
+Times each stage separately (preprocess_image, detect_layout_type,
+find_table_cells, readtext, group_regions_into_rows, parse_rows_to_schedule)
+over list and grid layouts
+at several resolutions and noise levels, and writes the results as JSON so
+runs from different commits can be compared:
+
+    python benchmarks/bench_parser.py --output before.json
+    # ...change the parser...
+    python benchmarks/bench_parser.py --output after.json --compare before.json
+
+readtext needs easyocr; without it (or with --no-ocr) that stage is skipped
+and the row stages run on the ground-truth boxes the images were drawn from.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from parser import PARSER_VERSION, PreprocessPipeline, ScheduleParser  # noqa: E402
+from synthetic import NOISE_LEVELS, RESOLUTIONS, make_case  # noqa: E402
+
+STAGES = [
+    "preprocess_image",
+    "detect_layout_type",
+    "find_table_cells",
+    "readtext",
+    "group_regions_into_rows",
+    "parse_rows_to_schedule",
+]
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(__file__),
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(func, repeat):
+    """
+    Run func repeat times. Returns (last result, best seconds, peak MB).
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        # parse_rows_to_schedule prints several lines per row
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+
+    # One more run under tracemalloc for memory, kept out of the timings
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, best, peak / (1024 * 1024)
+
+
+def run_case(schedule_parser, layout, resolution, noise, repeat, use_ocr):
+    image_bytes, expected, truth_regions = make_case(layout, resolution, noise)
+    stages = {}
+
+    def record(name, seconds, peak_mb):
+        stages[name] = {
+            "ms": round(seconds * 1000, 3),
+            "per_second": round(1 / seconds, 2) if seconds > 0 else None,
+            "peak_mb": round(peak_mb, 2),
+        }
+
+    (img, gray, thresh), seconds, peak = measure(
+        lambda: schedule_parser.preprocess_image(image_bytes), repeat
+    )
+    record("preprocess_image", seconds, peak)
+
+    layout_found, seconds, peak = measure(
+        lambda: schedule_parser.detect_layout_type(thresh), repeat
+    )
+    record("detect_layout_type", seconds, peak)
+
+    # Layout runs on a downscaled pyramid level, check it still agrees with
+    # the full resolution answer
+    layout_full_res = schedule_parser.detect_layout_type(thresh, level=0)
+
+    cell_rows, seconds, peak = measure(
+        lambda: schedule_parser.find_table_cells(thresh), repeat
+    )
+    record("find_table_cells", seconds, peak)
+
+    if use_ocr:
+        pipeline = PreprocessPipeline(image_bytes)
+        pipeline.get("rgb")
+        pipeline.get("gray")
+        ocr_results, seconds, peak = measure(
+            lambda: schedule_parser.read_text(pipeline), repeat
+        )
+        record("readtext", seconds, peak)
+    else:
+        ocr_results = truth_regions
+
+    regions = schedule_parser.regions_from_results(ocr_results)
+    rows, seconds, peak = measure(
+        lambda: schedule_parser.group_regions_into_rows(regions), repeat
+    )
+    record("group_regions_into_rows", seconds, peak)
+
+    schedule, seconds, peak = measure(
+        lambda: schedule_parser.parse_rows_to_schedule(rows), repeat
+    )
+    record("parse_rows_to_schedule", seconds, peak)
+
+    correct_days = sum(1 for day, shift in expected.items() if schedule[day] == shift)
+
+    return {
+        "layout": layout,
+        "resolution": resolution,
+        "noise": noise,
+        "detected_layout": layout_found,
+        "layout_matches_full_res": layout_found == layout_full_res,
+        "table_rows": len(cell_rows or []),
+        "regions": len(ocr_results),
+        "rows": len(rows),
+        "correct_days": correct_days,
+        "stages": stages,
+        "total_ms": round(sum(stage["ms"] for stage in stages.values()), 3),
+    }
+
+
+def case_key(case):
+    return (case["layout"], case["resolution"], case["noise"])
+
+
+def print_results(results, baseline=None):
+    baseline_cases = {}
+    if baseline:
+        baseline_cases = {case_key(case): case for case in baseline["cases"]}
+
+    header = f"{'case':<22}{'found':>6}" + "".join(f"{s[:14]:>16}" for s in STAGES)
+    print(header + f"{'total':>10}  ok")
+    print("-" * (len(header) + 14))
+
+    for case in results["cases"]:
+        name = "/".join(case_key(case))
+        old = baseline_cases.get(case_key(case))
+        cells = []
+        for stage in STAGES:
+            if stage not in case["stages"]:
+                cells.append(f"{'-':>16}")
+                continue
+            ms = case["stages"][stage]["ms"]
+            cell = f"{ms:.2f}"
+            if old and stage in old["stages"] and old["stages"][stage]["ms"] > 0:
+                cell += f" ({ms / old['stages'][stage]['ms']:.2f}x)"
+            cells.append(f"{cell:>16}")
+
+        found = case["detected_layout"]
+        if not case.get("layout_matches_full_res", True):
+            found += "*"
+
+        print(
+            f"{name:<22}{found:>6}"
+            + "".join(cells)
+            + f"{case['total_ms']:>10.1f}  {case['correct_days']}/7"
+        )
+
+    if not all(case.get("layout_matches_full_res", True) for case in results["cases"]):
+        print("\n* layout differs from the full resolution answer")
+
+    if baseline:
+        print(
+            f"\n(ratios are vs. {baseline.get('git_revision')}, "
+            "above 1.00x means slower)"
+        )
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="ScheduleParser stage benchmark")
+    arg_parser.add_argument("--layouts", nargs="+", default=["list", "grid"])
+    arg_parser.add_argument(
+        "--resolutions", nargs="+", default=list(RESOLUTIONS), choices=RESOLUTIONS
+    )
+    arg_parser.add_argument(
+        "--noise", nargs="+", default=list(NOISE_LEVELS), choices=NOISE_LEVELS
+    )
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--no-ocr", action="store_true", help="skip readtext")
+    arg_parser.add_argument("--output", help="write results as JSON to this file")
+    arg_parser.add_argument("--compare", help="JSON results from an earlier run")
+    args = arg_parser.parse_args()
+
+    schedule_parser = ScheduleParser()
+    use_ocr = not args.no_ocr
+    if use_ocr:
+        try:
+            schedule_parser.load_reader()
+        except ImportError:
+            print("easyocr is not installed, skipping the readtext stage\n")
+            use_ocr = False
+
+    results = {
+        "git_revision": git_revision(),
+        "parser_version": PARSER_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "ocr": use_ocr,
+        "repeat": args.repeat,
+        "cases": [],
+    }
+
+    for layout in args.layouts:
+        for resolution in args.resolutions:
+            for noise in args.noise:
+                results["cases"].append(
+                    run_case(
+                        schedule_parser, layout, resolution, noise, args.repeat, use_ocr
+                    )
+                )
+
+    # ru_maxrss is KB on Linux
+    results["max_rss_mb"] = round(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+    )
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print_results(results, baseline)
+    print(f"\nmax RSS: {results['max_rss_mb']} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
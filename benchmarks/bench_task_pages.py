@@ -0,0 +1,176 @@
+"""
+Task list latency against how many tasks a user has.
+
+Seeds one SQLite database with users owning --sizes tasks each (a third
+with no due date, so the NULL half of the due order is exercised), then
+for every sort order of index() times:
+
+    all       the old query: every task of the user
+    first     the first page
+    middle    the page halfway through, from its cursor
+    last      the last page
+
+    python benchmarks/bench_task_pages.py
+    python benchmarks/bench_task_pages.py --sizes 1000 100000 --page-size 100
+
+Prints the median milliseconds of each. Exits with status 1 if a page on the
+largest user takes more than --max-ratio times the same page on the
+smallest one.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from flask import Flask  # noqa: E402
+
+import database  # noqa: E402
+from models import db, Todo, User  # noqa: E402
+from pagination import encode_cursor, keyset_page, nulls_sort_first  # noqa: E402
+
+SORTS = {"created": Todo.date_created, "due": Todo.due, "completed": Todo.completed}
+
+
+def make_app(path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    database.init_app(app, db, f"sqlite:///{path}")
+    return app
+
+
+def seed(sizes):
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1)
+    for user_id, size in enumerate(sizes, start=1):
+        db.session.execute(
+            User.__table__.insert(),
+            {
+                "id": user_id,
+                "username": f"user{user_id}",
+                "email": f"user{user_id}@example.com",
+                "password_hash": "x",
+            },
+        )
+        db.session.execute(
+            Todo.__table__.insert(),
+            [
+                {
+                    "content": f"task {i}",
+                    "completed": rng.randint(0, 1),
+                    "date_created": start + timedelta(minutes=i),
+                    "due": date(2024, 1, 1) + timedelta(days=rng.randrange(365))
+                    if rng.random() < 0.67
+                    else None,
+                    "user_id": user_id,
+                }
+                for i in range(size)
+            ],
+        )
+    db.session.commit()
+
+
+def timed(function, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+        db.session.expunge_all()
+    return statistics.median(times) * 1000
+
+
+def measure(user_id, column, descending, page_size, repeats, nulls_first):
+    query = Todo.query.filter_by(user_id=user_id)
+    ordered = query.order_by(column.desc() if descending else column.asc())
+    total = query.count()
+
+    def cursor_at(position):
+        # Setup only: the cursor a reader would have arrived with
+        order = (column.desc(), Todo.id.desc()) if descending else (column, Todo.id)
+        row = query.order_by(*order).offset(max(0, position - 1)).first()
+        return encode_cursor(getattr(row, column.key), row.id)
+
+    def page(after):
+        return lambda: keyset_page(
+            query,
+            column,
+            Todo.id,
+            descending,
+            page_size,
+            after=after,
+            nulls_first=nulls_first,
+        )
+
+    middle = cursor_at(total // 2)
+    last = cursor_at(total - (total % page_size or page_size))
+    return {
+        "all": timed(ordered.all, repeats),
+        "first": timed(page(None), repeats),
+        "middle": timed(page(middle), repeats),
+        "last": timed(page(last), repeats),
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Task list page latency")
+    arg_parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000]
+    )
+    arg_parser.add_argument("--page-size", type=int, default=50)
+    arg_parser.add_argument("--repeats", type=int, default=5)
+    arg_parser.add_argument("--max-ratio", type=float, default=3.0)
+    args = arg_parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-pages-"), "tasks.db")
+    app = make_app(path)
+    failed = []
+    with app.app_context():
+        db.create_all()
+        seed(args.sizes)
+        nulls_first = nulls_sort_first(db.engine.dialect)
+
+        print(f"page size {args.page_size}, median ms of {args.repeats}\n")
+        print(
+            f"{'sort':<16}{'tasks':>8}{'all':>10}{'first':>9}"
+            f"{'middle':>9}{'last':>9}"
+        )
+        for sort, column in SORTS.items():
+            for descending in (False, True):
+                name = f"{sort} {'desc' if descending else 'asc'}"
+                results = [
+                    measure(
+                        user_id,
+                        column,
+                        descending,
+                        args.page_size,
+                        args.repeats,
+                        nulls_first,
+                    )
+                    for user_id in range(1, len(args.sizes) + 1)
+                ]
+                for size, timings in zip(args.sizes, results):
+                    print(
+                        f"{name:<16}{size:>8}{timings['all']:>10.2f}"
+                        f"{timings['first']:>9.2f}{timings['middle']:>9.2f}"
+                        f"{timings['last']:>9.2f}"
+                    )
+                for part in ("first", "middle", "last"):
+                    # Small absolute floor, sub-millisecond timings are noisy
+                    smallest = max(results[0][part], 0.5)
+                    if results[-1][part] > args.max_ratio * smallest:
+                        failed.append(f"{name} {part}")
+
+    if failed:
+        print(f"\nFAIL: page latency grew with task count for {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
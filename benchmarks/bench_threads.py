@@ -0,0 +1,139 @@
+"""
+Throughput of concurrent schedule parses, with and without a thread budget.
+
+Simulates N web workers on one machine (one process each, like gunicorn)
+all parsing at the same time, for N = 1, 2, 4, 8. Every concurrency level
+runs twice: once with torch and OpenCV left at their defaults (a thread per
+core in every process) and once with the cores split evenly between the
+workers, the way config.OCR_THREADS does it:
+
+    python benchmarks/bench_threads.py
+    python benchmarks/bench_threads.py --concurrency 1 4 --rounds 5
+
+Without easyocr (or with --no-ocr) only the OpenCV stages are run
+(preprocessing, layout and table line detection).
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from parser import PreprocessPipeline, ScheduleParser  # noqa: E402
+from synthetic import make_case  # noqa: E402
+
+
+def opencv_stages(schedule_parser, image_bytes):
+    thresh = PreprocessPipeline(image_bytes).threshold("sharpen")
+    schedule_parser.detect_layout_type(thresh)
+    schedule_parser.find_table_cells(thresh)
+
+
+def worker(threads, use_ocr, images, rounds, barrier, results):
+    schedule_parser = ScheduleParser(
+        threads=threads, interop_threads=1 if threads else None
+    )
+    if use_ocr:
+        schedule_parser.load_reader()
+
+        def parse(image_bytes):
+            schedule_parser.parse_schedule_bytes(image_bytes)
+
+    else:
+
+        def parse(image_bytes):
+            opencv_stages(schedule_parser, image_bytes)
+
+    latencies = []
+    # parse_rows_to_schedule prints several lines per row
+    with contextlib.redirect_stdout(io.StringIO()):
+        parse(images[0])  # warm up outside the timed part
+        barrier.wait()
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for image_bytes in images:
+                parse_start = time.perf_counter()
+                parse(image_bytes)
+                latencies.append(time.perf_counter() - parse_start)
+        end = time.perf_counter()
+
+    results.put((start, end, latencies))
+
+
+def run(concurrency, threads, use_ocr, images, rounds):
+    """
+    Returns (parses per second, median ms, p95 ms) over all workers.
+    """
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(concurrency)
+    results = context.Queue()
+
+    processes = [
+        context.Process(
+            target=worker, args=(threads, use_ocr, images, rounds, barrier, results)
+        )
+        for _ in range(concurrency)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    # perf_counter is the system-wide monotonic clock on Linux, so start and
+    # end times from different processes can be compared
+    wall = max(end for _, end, _ in outcomes) - min(start for start, _, _ in outcomes)
+    latencies = sorted(secs for _, _, timings in outcomes for secs in timings)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    return len(latencies) / wall, statistics.median(latencies) * 1000, p95 * 1000
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Concurrent parse throughput")
+    arg_parser.add_argument(
+        "--concurrency", nargs="+", type=int, default=[1, 2, 4, 8]
+    )
+    arg_parser.add_argument("--rounds", type=int, default=3)
+    arg_parser.add_argument("--no-ocr", action="store_true", help="OpenCV stages only")
+    args = arg_parser.parse_args()
+
+    use_ocr = not args.no_ocr
+    if use_ocr:
+        try:
+            import easyocr  # noqa: F401
+        except ImportError:
+            print("easyocr is not installed, timing the OpenCV stages only\n")
+            use_ocr = False
+
+    images = [
+        make_case(layout, "phone", "light", seed=seed)[0]
+        for seed, layout in enumerate(["list", "grid", "list", "grid"])
+    ]
+    cpu_count = os.cpu_count() or 1
+
+    print(f"{cpu_count} CPUs, {'full parse' if use_ocr else 'OpenCV stages'}\n")
+    print(
+        f"{'workers':>7}{'threads':>9}{'parses/s':>10}{'median ms':>11}{'p95 ms':>9}"
+    )
+    for concurrency in args.concurrency:
+        budget = max(1, cpu_count // concurrency)
+        for label, threads in (("default", None), (str(budget), budget)):
+            per_second, median_ms, p95_ms = run(
+                concurrency, threads, use_ocr, images, args.rounds
+            )
+            print(
+                f"{concurrency:>7}{label:>9}{per_second:>10.2f}"
+                f"{median_ms:>11.1f}{p95_ms:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
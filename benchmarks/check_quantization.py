@@ -0,0 +1,198 @@
+"""
+Accuracy and latency check for the int8-quantized OCR models.
+
+Parses a golden set of schedule images once with the full-precision models
+and once with ScheduleParser(quantize=True), and reports how many days each
+got right, how long each image took and how big the models are:
+
+    python benchmarks/check_quantization.py --golden path/to/golden
+    python benchmarks/check_quantization.py --max-drop 0.02
+
+A golden set is a directory of screenshots, each next to a .json file with
+the same name holding the expected schedule ({"Mon": "7am - 3pm", ...}).
+Without --golden the synthetic benchmark images are used.
+
+Each mode runs in its own process so their memory use doesn't mix. Exits
+with status 1 when int8 gets more than --max-drop (a fraction of all days)
+fewer days right than full precision.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from parser import DAYS_ORDER, ScheduleParser  # noqa: E402
+from synthetic import NOISE_LEVELS, RESOLUTIONS, make_case  # noqa: E402
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+def load_golden(directory):
+    """
+    Returns [(name, image_bytes, expected_schedule)] for a golden directory.
+    """
+    cases = []
+    for filename in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(filename)
+        if ext.lower() not in IMAGE_EXTENSIONS:
+            continue
+
+        expected_path = os.path.join(directory, stem + ".json")
+        if not os.path.exists(expected_path):
+            print(f"Skipping {filename}: no {stem}.json next to it")
+            continue
+
+        with open(os.path.join(directory, filename), "rb") as f:
+            image_bytes = f.read()
+        with open(expected_path) as f:
+            expected = json.load(f)
+        cases.append((filename, image_bytes, expected))
+
+    return cases
+
+
+def synthetic_cases():
+    cases = []
+    for layout in ("list", "grid"):
+        for resolution in RESOLUTIONS:
+            for noise in NOISE_LEVELS:
+                image_bytes, expected, _ = make_case(layout, resolution, noise)
+                name = f"{layout}/{resolution}/{noise}"
+                cases.append((name, image_bytes, expected))
+    return cases
+
+
+def run_mode(parser_options, cases):
+    """
+    Parse every case with one ScheduleParser(**parser_options). Runs in a
+    child process.
+    """
+    schedule_parser = ScheduleParser(**parser_options)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    schedule_parser.load_reader()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    results = []
+    for name, image_bytes, expected in cases:
+        # parse_rows_to_schedule prints several lines per row
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            schedule = schedule_parser.parse_schedule_bytes(image_bytes)
+            seconds = time.perf_counter() - start
+
+        wrong_days = [
+            day for day in DAYS_ORDER if schedule.get(day) != expected.get(day)
+        ]
+        results.append(
+            {
+                "name": name,
+                "ms": round(seconds * 1000, 1),
+                "correct_days": len(DAYS_ORDER) - len(wrong_days),
+                "wrong_days": {day: schedule.get(day) for day in wrong_days},
+            }
+        )
+
+    return {
+        "options": parser_options,
+        "model": schedule_parser.model_info,
+        "load_seconds": round(schedule_parser.load_seconds, 2),
+        # ru_maxrss is KB on Linux
+        "model_rss_mb": round((rss_after - rss_before) / 1024, 1),
+        "results": results,
+    }
+
+
+def summarize(run):
+    results = run["results"]
+    total_days = len(results) * len(DAYS_ORDER)
+    times = [result["ms"] for result in results]
+
+    return {
+        "day_accuracy": sum(r["correct_days"] for r in results) / total_days,
+        "exact_images": sum(1 for r in results if not r["wrong_days"]),
+        "median_ms": statistics.median(times),
+        "mean_ms": statistics.mean(times),
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="int8 OCR accuracy check")
+    arg_parser.add_argument("--golden", help="directory of images + expected .json")
+    arg_parser.add_argument(
+        "--max-drop",
+        type=float,
+        default=0.0,
+        help="allowed drop in day accuracy for int8, e.g. 0.02 for 2 points",
+    )
+    arg_parser.add_argument("--output", help="write both runs as JSON to this file")
+    args = arg_parser.parse_args()
+
+    cases = load_golden(args.golden) if args.golden else synthetic_cases()
+    if not cases:
+        sys.exit("No golden images found")
+
+    # A fresh process per mode, so each starts without the other's model
+    context = multiprocessing.get_context("spawn")
+    runs = {}
+    for label, quantize in (("fp32", False), ("int8", True)):
+        with context.Pool(1) as pool:
+            runs[label] = pool.apply(run_mode, ({"quantize": quantize}, cases))
+
+    summaries = {label: summarize(run) for label, run in runs.items()}
+
+    print(f"{len(cases)} images\n")
+    print(
+        f"{'mode':<6}{'day acc':>9}{'exact':>8}{'median ms':>11}{'mean ms':>10}"
+        f"{'recog MB':>10}{'detect MB':>11}{'RSS MB':>8}{'load s':>8}"
+    )
+    for label, run in runs.items():
+        summary = summaries[label]
+        model = run["model"]
+        print(
+            f"{label:<6}{summary['day_accuracy']:>9.1%}"
+            f"{summary['exact_images']:>5}/{len(cases):<2}"
+            f"{summary['median_ms']:>11.1f}{summary['mean_ms']:>10.1f}"
+            f"{model['recognizer_mb']:>10}{model['detector_mb']:>11}"
+            f"{run['model_rss_mb']:>8}{run['load_seconds']:>8}"
+        )
+
+    print(
+        f"\nint8 quantized {runs['int8']['model']['recognizer_quantized_layers']} "
+        f"recognizer and {runs['int8']['model']['detector_quantized_layers']} "
+        "detector layers"
+    )
+
+    fp32_results = {r["name"]: r for r in runs["fp32"]["results"]}
+    for result in runs["int8"]["results"]:
+        baseline = fp32_results[result["name"]]
+        if result["wrong_days"] != baseline["wrong_days"]:
+            print(
+                f"  {result['name']}: fp32 wrong {baseline['wrong_days'] or '-'}, "
+                f"int8 wrong {result['wrong_days'] or '-'}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"runs": runs, "summaries": summaries}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    drop = summaries["fp32"]["day_accuracy"] - summaries["int8"]["day_accuracy"]
+    speedup = summaries["fp32"]["median_ms"] / summaries["int8"]["median_ms"]
+    print(f"\nint8: {drop:+.1%} day accuracy lost, {speedup:.2f}x median speed")
+    if drop > args.max_drop:
+        print(f"FAIL: accuracy dropped by more than {args.max_drop:.1%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
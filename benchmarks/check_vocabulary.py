@@ -0,0 +1,135 @@
+"""
+Latency and accuracy of vocabulary mode against full-charset recognition.
+
+Parses the golden set (see check_quantization.py) once with the recognizer
+free to output any character and once with ScheduleParser(vocabulary=True),
+which only allows the characters in parser.SCHEDULE_ALLOWLIST:
+
+    python benchmarks/check_vocabulary.py --golden path/to/golden
+    python benchmarks/check_vocabulary.py --max-drop 0.0
+
+Besides day accuracy and latency it counts, in the raw recognizer output,
+what the tokenizer's OCR fixups still have to deal with: times with a 1
+misread as a letter (OCR_FIXUP_PATTERN), characters outside the allowlist,
+and "1am" end times corrected to 11am. Both modes use the same quantize
+setting. Exits with status 1 when vocabulary mode gets more than --max-drop
+(a fraction of all days) fewer days right.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from check_quantization import (  # noqa: E402
+    load_golden,
+    run_mode,
+    summarize,
+    synthetic_cases,
+)
+from parser import (  # noqa: E402
+    OCR_FIXUP_PATTERN,
+    SCHEDULE_ALLOWLIST,
+    PreprocessPipeline,
+    ScheduleParser,
+    tokenize_row,
+)
+
+
+def count_fixups(parser_options, cases):
+    """
+    What the fixups see in each mode's raw OCR text. Runs in a child process.
+    """
+    schedule_parser = ScheduleParser(**parser_options)
+    schedule_parser.load_reader()
+    allowed = set(SCHEDULE_ALLOWLIST)
+
+    counts = {"texts": 0, "one_as_letter": 0, "outside_allowlist": 0, "to_11am": 0}
+    for _, image_bytes, _ in cases:
+        with contextlib.redirect_stdout(io.StringIO()):
+            ocr_results = schedule_parser.read_text(PreprocessPipeline(image_bytes))
+
+        for _, text, _ in ocr_results:
+            counts["texts"] += 1
+            counts["one_as_letter"] += len(OCR_FIXUP_PATTERN.findall(text))
+            counts["outside_allowlist"] += sum(1 for c in text if c not in allowed)
+            counts["to_11am"] += tokenize_row(text).corrected_from is not None
+
+    return counts
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Vocabulary mode check")
+    arg_parser.add_argument("--golden", help="directory of images + expected .json")
+    arg_parser.add_argument(
+        "--max-drop",
+        type=float,
+        default=0.0,
+        help="allowed drop in day accuracy, e.g. 0.02 for 2 points",
+    )
+    arg_parser.add_argument(
+        "--no-quantize", action="store_true", help="run both modes in fp32"
+    )
+    arg_parser.add_argument("--output", help="write both runs as JSON to this file")
+    args = arg_parser.parse_args()
+
+    cases = load_golden(args.golden) if args.golden else synthetic_cases()
+    if not cases:
+        sys.exit("No golden images found")
+
+    context = multiprocessing.get_context("spawn")
+    runs = {}
+    fixups = {}
+    for label, vocabulary in (("full", False), ("vocab", True)):
+        options = {"quantize": not args.no_quantize, "vocabulary": vocabulary}
+        with context.Pool(1) as pool:
+            runs[label] = pool.apply(run_mode, (options, cases))
+            fixups[label] = pool.apply(count_fixups, (options, cases))
+
+    summaries = {label: summarize(run) for label, run in runs.items()}
+
+    print(f"{len(cases)} images\n")
+    print(
+        f"{'mode':<6}{'day acc':>9}{'exact':>8}{'median ms':>11}{'mean ms':>10}"
+        f"{'texts':>7}{'1->l/i':>8}{'other chr':>11}{'->11am':>8}"
+    )
+    for label in runs:
+        summary = summaries[label]
+        counts = fixups[label]
+        print(
+            f"{label:<6}{summary['day_accuracy']:>9.1%}"
+            f"{summary['exact_images']:>5}/{len(cases):<2}"
+            f"{summary['median_ms']:>11.1f}{summary['mean_ms']:>10.1f}"
+            f"{counts['texts']:>7}{counts['one_as_letter']:>8}"
+            f"{counts['outside_allowlist']:>11}{counts['to_11am']:>8}"
+        )
+
+    full_results = {r["name"]: r for r in runs["full"]["results"]}
+    for result in runs["vocab"]["results"]:
+        baseline = full_results[result["name"]]
+        if result["wrong_days"] != baseline["wrong_days"]:
+            print(
+                f"  {result['name']}: full wrong {baseline['wrong_days'] or '-'}, "
+                f"vocab wrong {result['wrong_days'] or '-'}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"runs": runs, "summaries": summaries, "fixups": fixups}, f)
+        print(f"Results written to {args.output}")
+
+    drop = summaries["full"]["day_accuracy"] - summaries["vocab"]["day_accuracy"]
+    speedup = summaries["full"]["median_ms"] / summaries["vocab"]["median_ms"]
+    print(f"\nvocab: {drop:+.1%} day accuracy lost, {speedup:.2f}x median speed")
+    if drop > args.max_drop:
+        print(f"FAIL: accuracy dropped by more than {args.max_drop:.1%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Concurrent-write stress test for the SQLite setup.
+
+Runs N worker processes (like gunicorn workers) against one SQLite file,
+each looping over what the task routes do: load the user, then either
+mark a task complete/incomplete, edit it, or list the user's tasks. Every
+mode runs on a fresh database file:
+
+    default   the old setup: SQLAlchemy/pysqlite defaults, rollback journal
+    tuned     database.init_app: WAL, synchronous=NORMAL, busy_timeout, mmap
+
+    python benchmarks/stress_db_writes.py
+    python benchmarks/stress_db_writes.py --workers 16 --seconds 20
+
+Reports operations per second, write latency and how many operations
+failed with "database is locked". Exits with status 1 if the tuned mode
+had any.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from flask import Flask  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+import config  # noqa: E402
+import database  # noqa: E402
+from models import db, Todo, User  # noqa: E402
+
+TASKS_PER_USER = 50
+
+
+def make_app(mode, path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    url = f"sqlite:///{path}"
+
+    if mode == "default":
+        app.config["SQLALCHEMY_DATABASE_URI"] = url
+        db.init_app(app)
+    else:
+        database.init_app(
+            app,
+            db,
+            url,
+            busy_timeout_ms=config.SQLITE_BUSY_TIMEOUT_MS,
+            mmap_size=config.SQLITE_MMAP_MB * 1024 * 1024,
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+        )
+    return app
+
+
+def seed(mode, path, users):
+    app = make_app(mode, path)
+    with app.app_context():
+        db.create_all()
+        for i in range(users):
+            user = User(
+                username=f"stress{i}", email=f"stress{i}@example.com", password_hash="x"
+            )
+            db.session.add(user)
+            db.session.flush()
+            db.session.add_all(
+                Todo(content=f"task {j}", user_id=user.id)
+                for j in range(TASKS_PER_USER)
+            )
+        db.session.commit()
+        db.engine.dispose()
+
+
+def worker(mode, path, users, seconds, barrier, results):
+    app = make_app(mode, path)
+    rng = random.Random(os.getpid())
+    counts = {"reads": 0, "writes": 0, "locked": 0, "errors": 0}
+    write_latencies = []
+
+    with app.app_context():
+        barrier.wait()
+        deadline = time.perf_counter() + seconds
+
+        while time.perf_counter() < deadline:
+            user_id = rng.randint(1, users)
+            action = rng.random()
+            start = time.perf_counter()
+            try:
+                # login_manager's user_loader runs on every request
+                db.session.get(User, user_id)
+
+                if action < 0.4:
+                    Todo.query.filter_by(user_id=user_id).order_by(
+                        Todo.date_created
+                    ).all()
+                    counts["reads"] += 1
+                else:
+                    task = (
+                        Todo.query.filter_by(user_id=user_id)
+                        .offset(rng.randrange(TASKS_PER_USER))
+                        .first()
+                    )
+                    if action < 0.8:
+                        task.completed = 1 - (task.completed or 0)
+                    else:
+                        task.content = f"edited {rng.random():.6f}"
+                    db.session.commit()
+                    counts["writes"] += 1
+                    write_latencies.append(time.perf_counter() - start)
+            except OperationalError as e:
+                db.session.rollback()
+                if "locked" in str(e):
+                    counts["locked"] += 1
+                else:
+                    counts["errors"] += 1
+            finally:
+                db.session.remove()
+
+    results.put((counts, write_latencies))
+
+
+def run(mode, workers, users, seconds):
+    directory = tempfile.mkdtemp(prefix="stress-db-")
+    path = os.path.join(directory, "tasks.db")
+    seed(mode, path, users)
+
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [
+        context.Process(
+            target=worker, args=(mode, path, users, seconds, barrier, results)
+        )
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    totals = {"reads": 0, "writes": 0, "locked": 0, "errors": 0}
+    latencies = []
+    for counts, write_latencies in outcomes:
+        for key, value in counts.items():
+            totals[key] += value
+        latencies.extend(write_latencies)
+
+    latencies.sort()
+    totals["ops_per_second"] = (totals["reads"] + totals["writes"]) / seconds
+    totals["median_write_ms"] = statistics.median(latencies) * 1000 if latencies else 0
+    totals["p99_write_ms"] = (
+        latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+        if latencies
+        else 0
+    )
+    return totals
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="SQLite concurrent writes")
+    arg_parser.add_argument("--workers", type=int, default=8)
+    arg_parser.add_argument("--users", type=int, default=20)
+    arg_parser.add_argument("--seconds", type=float, default=10)
+    arg_parser.add_argument(
+        "--modes", nargs="+", default=["default", "tuned"], choices=["default", "tuned"]
+    )
+    args = arg_parser.parse_args()
+
+    print(f"{args.workers} workers, {args.users} users, {args.seconds:g}s per mode\n")
+    print(
+        f"{'mode':<9}{'ops/s':>9}{'writes':>8}{'reads':>8}{'locked':>8}"
+        f"{'errors':>8}{'median ms':>11}{'p99 ms':>9}"
+    )
+    locked = {}
+    for mode in args.modes:
+        totals = run(mode, args.workers, args.users, args.seconds)
+        locked[mode] = totals["locked"]
+        print(
+            f"{mode:<9}{totals['ops_per_second']:>9.0f}{totals['writes']:>8}"
+            f"{totals['reads']:>8}{totals['locked']:>8}{totals['errors']:>8}"
+            f"{totals['median_write_ms']:>11.1f}{totals['p99_write_ms']:>9.1f}"
+        )
+
+    if locked.get("tuned"):
+        print("\nFAIL: database is locked errors with the tuned settings")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
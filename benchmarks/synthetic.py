@@ -0,0 +1,128 @@
+"""
+Renders synthetic weekly schedule screenshots for the benchmarks.
+
+Every image comes with the ground truth it was drawn from: the schedule
+dict ScheduleParser should produce and the text boxes (in readtext
+format) that were drawn, so the stages after OCR can be measured without
+a model.
+"""
+
+import random
+
+import cv2
+import numpy as np
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+# (width, height) of common phone screenshots
+RESOLUTIONS = {
+    "small": (750, 1334),
+    "phone": (1170, 2532),
+    "large": (1290, 2796),
+}
+
+NOISE_LEVELS = {"clean": 0, "light": 8, "heavy": 20}
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def random_week(rng):
+    schedule = {}
+    for day in DAYS:
+        if rng.random() < 0.3:
+            schedule[day] = "Not Scheduled"
+        else:
+            start = rng.randint(1, 11)
+            end = rng.randint(1, 11)
+            schedule[day] = f"{start}am - {end}pm"
+    return schedule
+
+
+def _draw_text(img, text, x, y, scale, regions):
+    thickness = max(1, int(scale * 2))
+    (w, h), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+    cv2.putText(img, text, (x, y), FONT, scale, (30, 30, 30), thickness, cv2.LINE_AA)
+
+    top = y - h
+    bottom = y + baseline
+    bbox = [[x, top], [x + w, top], [x + w, bottom], [x, bottom]]
+    regions.append((bbox, text, 1.0))
+
+
+def render_list(schedule, width, height, first_date=1):
+    """
+    One day per block, day + date on one line and the shift below it, like
+    most workforce apps' list view.
+    """
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    regions = []
+
+    scale = width / 700
+    block = height // (len(DAYS) + 1)
+    x = int(width * 0.08)
+
+    for i, day in enumerate(DAYS):
+        y = block * (i + 1)
+        _draw_text(img, f"{day} {first_date + i}", x, y, scale, regions)
+        _draw_text(img, schedule[day], x, y + int(block * 0.4), scale, regions)
+
+    return img, regions
+
+
+def render_grid(schedule, width, height, first_date=1):
+    """
+    Table with ruled lines: Day | Date | Shift.
+    """
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    regions = []
+
+    scale = width / 900
+    top = int(height * 0.1)
+    row_h = int(height * 0.8) // (len(DAYS) + 1)
+    columns = [int(width * 0.05), int(width * 0.3), int(width * 0.5), int(width * 0.95)]
+    line = max(2, width // 400)
+
+    for i in range(len(DAYS) + 2):
+        y = top + i * row_h
+        cv2.line(img, (columns[0], y), (columns[-1], y), (0, 0, 0), line)
+    for x in columns:
+        cv2.line(img, (x, top), (x, top + (len(DAYS) + 1) * row_h), (0, 0, 0), line)
+
+    pad = int(width * 0.02)
+    text_y = top + int(row_h * 0.65)
+    for text, x in zip(["Day", "Date", "Shift"], columns):
+        _draw_text(img, text, x + pad, text_y, scale, regions)
+
+    for i, day in enumerate(DAYS):
+        y = text_y + (i + 1) * row_h
+        _draw_text(img, day, columns[0] + pad, y, scale, regions)
+        _draw_text(img, str(first_date + i), columns[1] + pad, y, scale, regions)
+        _draw_text(img, schedule[day], columns[2] + pad, y, scale, regions)
+
+    return img, regions
+
+
+def add_noise(img, sigma, rng):
+    if sigma <= 0:
+        return img
+    noise = np.random.default_rng(rng.randint(0, 2**31)).normal(0, sigma, img.shape)
+    return np.clip(img.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+
+
+def make_case(layout, resolution, noise, seed=0):
+    """
+    Returns (png_bytes, expected_schedule, regions) for one synthetic image.
+    """
+    rng = random.Random(seed)
+    width, height = RESOLUTIONS[resolution]
+    schedule = random_week(rng)
+
+    render = render_grid if layout == "grid" else render_list
+    img, regions = render(schedule, width, height)
+    img = add_noise(img, NOISE_LEVELS[noise], rng)
+
+    ok, encoded = cv2.imencode(".png", img)
+    if not ok:
+        raise RuntimeError("Could not encode synthetic image")
+
+    return encoded.tobytes(), schedule, regions
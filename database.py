@@ -0,0 +1,89 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def normalize_url(url):
+    """
+    Hosting platforms hand out postgres:// URLs, which SQLAlchemy 1.4+ no
+    longer accepts.
+    """
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://") :]
+    return url
+
+
+def is_sqlite(url):
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def engine_options(
+    url, pool_size=5, max_overflow=10, pool_timeout=30, pool_recycle=1800
+):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for url, with the pool sized explicitly.
+
+    SQLite files get a plain QueuePool: connections are local and never go
+    stale. A database server gets pre-ping (a dropped connection is
+    replaced before use instead of failing a request) and connections are
+    recycled before the server's idle timeout closes them.
+    """
+    if is_sqlite(url):
+        database = make_url(url).database
+        if not database or database == ":memory:":
+            # One shared connection, SQLAlchemy picks the pool for these
+            return {}
+        return {
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": pool_timeout,
+        }
+
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+        "pool_recycle": pool_recycle,
+        "pool_pre_ping": True,
+    }
+
+
+def set_sqlite_pragmas(engine, busy_timeout_ms=5000, mmap_size=256 * 1024 * 1024):
+    """
+    Tune every new SQLite connection of engine for several web workers:
+
+    - journal_mode=WAL: readers no longer block the writer or wait for it,
+      and commits append to the log instead of rewriting pages in place.
+    - synchronous=NORMAL: fsync at checkpoints instead of every commit.
+      Safe in WAL mode; a power cut can lose the last commits, never
+      corrupt the file.
+    - busy_timeout: a writer waits up to this long for another writer
+      instead of failing with "database is locked".
+    - mmap_size: reads go through memory-mapped pages, without a copy into
+      SQLite's page cache.
+    """
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        cursor.close()
+
+
+def init_app(
+    app, db, url, busy_timeout_ms=5000, mmap_size=256 * 1024 * 1024, **pool
+):
+    """
+    Point db at url for app: sets the engine options (pool settings from
+    pool, see engine_options) and, for SQLite, the connection pragmas.
+    """
+    url = normalize_url(url)
+    app.config["SQLALCHEMY_DATABASE_URI"] = url
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(url, **pool)
+    db.init_app(app)
+
+    if is_sqlite(url):
+        with app.app_context():
+            set_sqlite_pragmas(db.engine, busy_timeout_ms, mmap_size)
@@ -0,0 +1,228 @@
+import json
+import os
+import queue
+import random
+import shutil
+import threading
+import time
+import uuid
+
+
+class NullCapture:
+    """
+    Stands in for a CaptureSession when a job isn't sampled. Every call is a
+    no-op, so the parse does no encoding, file or stdout I/O for debugging.
+    """
+
+    enabled = False
+
+    def log(self, message):
+        pass
+
+    def image(self, name, image):
+        pass
+
+    def regions(self, name, ocr_results, image=None):
+        pass
+
+    def close(self, error=None):
+        pass
+
+
+class EchoCapture(NullCapture):
+    """
+    Prints log lines to stdout and keeps nothing, for parse_schedule(debug=True)
+    from the command line.
+    """
+
+    def log(self, message):
+        print(message)
+
+
+NULL_CAPTURE = NullCapture()
+ECHO_CAPTURE = EchoCapture()
+
+
+class CaptureSession:
+    """
+    Debug artifacts of one sampled parse.
+
+    The parser only hands over references (images are not copied or
+    encoded); close() queues everything for DebugCapture's writer thread.
+    """
+
+    enabled = True
+
+    def __init__(self, capture, name, echo=False):
+        self.capture = capture
+        self.name = name
+        self.echo = echo
+        self.created_at = time.time()
+        self.lines = []
+        self.images = {}
+        self.region_sets = {}
+        self.error = None
+        self._closed = False
+
+    def log(self, message):
+        self.lines.append(message)
+        if self.echo:
+            print(message)
+
+    def image(self, name, image):
+        self.images[name] = image
+
+    def regions(self, name, ocr_results, image=None):
+        """
+        Keep a pass's recognizer output, drawn over image (the name of an
+        image() artifact) when the session is written.
+        """
+        self.region_sets[name] = (list(ocr_results), image)
+
+    def close(self, error=None):
+        if self._closed:
+            return
+        self._closed = True
+        self.error = error
+        self.capture._submit(self)
+
+
+class DebugCapture:
+    """
+    Samples parses and writes their debug artifacts in the background.
+
+    start() picks sample_rate of the jobs (0 turns capturing off, 1 keeps
+    every job). A sampled job gets a CaptureSession, the rest NULL_CAPTURE.
+    Each closed session is written by a single writer thread to its own
+    directory under root, named by time and job, holding:
+
+        thresh.png          the thresholded image the layout was read from
+        <pass>.png          recognized boxes drawn over it, one per OCR pass
+        regions.json        every pass's boxes, text and confidence
+        log.txt             the row dump and the parser's decisions
+
+    Only the newest keep sessions are kept on disk. When the writer falls
+    max_queue sessions behind, new ones are dropped rather than held.
+    """
+
+    def __init__(self, root, sample_rate=0.0, keep=200, max_queue=16):
+        self.root = root
+        self.sample_rate = sample_rate
+        self.keep = keep
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.stats = {"sampled": 0, "written": 0, "dropped": 0, "failed": 0}
+
+    def start(self, name=None, force=False, echo=False):
+        """
+        A CaptureSession for a sampled (or forced) job, else NULL_CAPTURE
+        (ECHO_CAPTURE when echo is set). name identifies the job in the
+        artifact directory; a random one is used without it.
+        """
+        if not force and (
+            self.sample_rate <= 0 or random.random() >= self.sample_rate
+        ):
+            return ECHO_CAPTURE if echo else NULL_CAPTURE
+
+        with self._lock:
+            self.stats["sampled"] += 1
+
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        # Names from callers end up in a path
+        safe_name = "".join(c for c in str(name or "") if c.isalnum() or c in "-_")
+        unique = uuid.uuid4().hex[:8]
+        return CaptureSession(
+            self, f"{stamp}-{safe_name or 'job'}-{unique}", echo=echo
+        )
+
+    def _submit(self, session):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                # Started on first use, so a forked web worker gets its own
+                self._thread = threading.Thread(
+                    target=self._run, name="debug-capture", daemon=True
+                )
+                self._thread.start()
+
+        try:
+            self._queue.put_nowait(session)
+        except queue.Full:
+            with self._lock:
+                self.stats["dropped"] += 1
+
+    def flush(self):
+        """
+        Block until every queued session is written.
+        """
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            session = self._queue.get()
+            try:
+                self._write(session)
+                self._prune()
+                with self._lock:
+                    self.stats["written"] += 1
+            except Exception as e:
+                print(f"Could not write debug capture {session.name}: {e}")
+                with self._lock:
+                    self.stats["failed"] += 1
+            finally:
+                self._queue.task_done()
+
+    def _write(self, session):
+        if session.images:
+            # Imported here, so web workers that leave OCR to ocr_server.py
+            # (their sessions only hold log lines) never load OpenCV/numpy
+            import cv2
+
+        directory = os.path.join(self.root, session.name)
+        os.makedirs(directory)
+
+        for name, image in session.images.items():
+            cv2.imwrite(os.path.join(directory, f"{name}.png"), image)
+
+        regions = {}
+        for name, (ocr_results, image_name) in session.region_sets.items():
+            regions[name] = [
+                {
+                    "box": [[int(x), int(y)] for x, y in bbox],
+                    "text": text,
+                    "confidence": round(float(conf), 3),
+                }
+                for bbox, text, conf in ocr_results
+            ]
+
+            base = session.images.get(image_name)
+            if base is None:
+                continue
+            overlay = cv2.cvtColor(base, cv2.COLOR_GRAY2BGR) if base.ndim == 2 else base
+            overlay = overlay.copy()
+            for region in regions[name]:
+                (x0, y0), (x1, y1) = region["box"][0], region["box"][2]
+                cv2.rectangle(overlay, (x0, y0), (x1, y1), (0, 0, 255), 2)
+            cv2.imwrite(os.path.join(directory, f"{name}.png"), overlay)
+
+        with open(os.path.join(directory, "regions.json"), "w") as f:
+            json.dump(regions, f, indent=2)
+
+        with open(os.path.join(directory, "log.txt"), "w", encoding="utf-8") as f:
+            f.write(
+                time.strftime(
+                    "%Y-%m-%d %H:%M:%S\n", time.localtime(session.created_at)
+                )
+            )
+            if session.error:
+                f.write(f"FAILED: {session.error}\n")
+            f.write("\n".join(session.lines) + "\n")
+
+    def _prune(self):
+        # Session names start with a timestamp, so they sort oldest first
+        sessions = sorted(
+            entry.name for entry in os.scandir(self.root) if entry.is_dir()
+        )
+        for name in sessions[: max(0, len(sessions) - self.keep)]:
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
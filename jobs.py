@@ -0,0 +1,224 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from debug_capture import NULL_CAPTURE
+from models import db, OCRJob, Schedule
+from ocr_metrics import NULL_TIMER, StageTimer
+from upload_store import keys_from
+
+
+class QueueFullError(Exception):
+    """Raised when too many OCR jobs are already waiting to run."""
+
+
+STALE_JOB_ERROR = (
+    "The schedule reader stopped before finishing this one. "
+    "Please upload it again."
+)
+
+
+def _move(job_id, from_status, **values):
+    """
+    Update job job_id with values if its status is still from_status, in
+    the caller's transaction. Returns whether it was.
+    """
+    moved = OCRJob.query.filter_by(id=job_id, status=from_status).update(
+        values, synchronize_session=False
+    )
+    return moved == 1
+
+
+class OCRJobQueue:
+    """
+    Runs schedule OCR on a small thread pool so uploads return right away.
+
+    Job state lives in the OCRJob table, so any web worker can answer a
+    status poll, not just the one that accepted the upload.
+
+    When metrics (a StageHistograms) is given, every job is timed stage by
+    stage, the breakdown is stored on the job and added to the histograms.
+
+    When upload_store is given, the schedule a job creates takes a reference
+    on the stored screenshots named in its image_filename.
+
+    When debug_capture (a DebugCapture) is given, the jobs it samples keep
+    their debug artifacts, named after the job id.
+
+    Jobs only run in the thread pool of the worker that accepted them, so a
+    worker restart leaves its jobs queued or running for good. Those older
+    than job_timeout seconds are failed by expire_if_stale, and one that
+    finishes after that stays failed without creating its schedule.
+    """
+
+    def __init__(
+        self,
+        parser,
+        max_workers=1,
+        max_pending=8,
+        metrics=None,
+        upload_store=None,
+        debug_capture=None,
+        job_timeout=600,
+    ):
+        self.parser = parser
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.metrics = metrics
+        self.upload_store = upload_store
+        self.debug_capture = debug_capture
+        self.job_timeout = job_timeout
+        self.app = None
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ocr-job"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0  # queued + running in this process
+
+    def init_app(self, app):
+        self.app = app
+
+    @property
+    def pending(self):
+        with self._lock:
+            return self._pending
+
+    def expire_if_stale(self, job):
+        """
+        Fail job if it has been queued or running for longer than
+        job_timeout, which means the worker holding it is gone. Returns
+        whether it was failed.
+        """
+        if job.status not in ("queued", "running"):
+            return False
+        # Stored without a timezone, in UTC
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        created_at = job.created_at.replace(tzinfo=None)
+        if now - created_at < timedelta(seconds=self.job_timeout):
+            return False
+
+        # Unless it finished in the meantime
+        expired = _move(
+            job.id,
+            job.status,
+            status="failed",
+            error=STALE_JOB_ERROR,
+            finished_at=datetime.now(timezone.utc),
+        )
+        db.session.commit()
+        return expired
+
+    def submit(self, user_id, images, image_filename, week_start):
+        """
+        Record a new job and hand it to the pool. Returns the job id.
+
+        images is a list of encoded screenshots of the same week, in order.
+        They are kept in memory until the job runs; max_pending bounds how
+        many are held at once.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError(
+                    f"{self._pending} schedules are already being processed"
+                )
+            self._pending += 1
+
+        try:
+            job = OCRJob(
+                id=uuid.uuid4().hex,
+                user_id=user_id,
+                week_start_date=week_start,
+                image_filename=image_filename,
+            )
+            db.session.add(job)
+            db.session.commit()
+
+            self._executor.submit(self._run, job.id, images, time.perf_counter())
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+        return job.id
+
+    def _run(self, job_id, images, submitted_at):
+        timer = StageTimer() if self.metrics is not None else NULL_TIMER
+        if timer.enabled:
+            timer.timings["queue_wait"] = time.perf_counter() - submitted_at
+
+        capture = NULL_CAPTURE
+        if self.debug_capture is not None:
+            capture = self.debug_capture.start(job_id)
+
+        try:
+            with self.app.app_context():
+                # Only a job still queued is started; one that waited so long
+                # it was given up on (see expire_if_stale) stays failed
+                started = _move(job_id, "queued", status="running")
+                db.session.commit()
+                if not started:
+                    return
+                job = db.session.get(OCRJob, job_id)
+                week_start = job.week_start_date
+                capture.log(f"Week starts on: {week_start} ({week_start:%A})")
+
+                try:
+                    report = {}
+                    if len(images) == 1:
+                        parsed_schedule = self.parser.parse_schedule_bytes(
+                            images[0], timer=timer, capture=capture
+                        )
+                    else:
+                        parsed_schedule, report = self.parser.parse_schedules_batch(
+                            images, timer=timer, capture=capture
+                        )
+                    capture.close()
+
+                    if timer.enabled:
+                        report["stages"] = timer.as_ms()
+                        self.metrics.observe(timer.timings)
+
+                    new_schedule = Schedule(
+                        user_id=job.user_id,
+                        week_start_date=job.week_start_date,
+                        image_filename=job.image_filename,
+                        parsed_data=parsed_schedule,
+                    )
+                    db.session.add(new_schedule)
+                    if self.upload_store is not None:
+                        self.upload_store.add_refs(keys_from(job.image_filename))
+                    db.session.flush()
+
+                    finished = _move(
+                        job_id,
+                        "running",
+                        status="done",
+                        schedule_id=new_schedule.id,
+                        timings=report or None,
+                        finished_at=datetime.now(timezone.utc),
+                    )
+                    if not finished:
+                        # Expired while it ran and the user was told to upload
+                        # again; keeping the schedule would make a duplicate
+                        print(f"OCR job {job_id} expired, dropping its schedule")
+                        db.session.rollback()
+                        return
+                except Exception as e:
+                    print(f"OCR job {job_id} failed: {e}")
+                    capture.close(error=str(e))
+                    db.session.rollback()
+                    _move(
+                        job_id,
+                        "running",
+                        status="failed",
+                        error=str(e),
+                        finished_at=datetime.now(timezone.utc),
+                    )
+
+                db.session.commit()
+        finally:
+            with self._lock:
+                self._pending -= 1
@@ -0,0 +1,173 @@
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import sqlalchemy as sa
+from sqlalchemy.exc import OperationalError
+
+from models import db, OCRJob, Schedule, Todo
+
+# Which migrations a database has had, kept out of db.metadata so create_all
+# never touches it
+_metadata = sa.MetaData()
+schema_migrations = sa.Table(
+    "schema_migrations",
+    _metadata,
+    sa.Column("version", sa.Integer, primary_key=True),
+    sa.Column("description", sa.String(200), nullable=False),
+    sa.Column("applied_at", sa.DateTime, nullable=False),
+)
+
+# (version, description, function taking a Connection), in order
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(apply):
+        MIGRATIONS.append((version, description, apply))
+        return apply
+
+    return register
+
+
+@migration(1, "create tables")
+def _create_tables(connection):
+    # Databases from before migrations were made by db.create_all() and
+    # already have every table, so this only creates what's missing
+    db.metadata.create_all(connection, checkfirst=True)
+
+
+@migration(2, "per-user indexes for the task and schedule lists")
+def _user_sort_indexes(connection):
+    names = {
+        "ix_todo_user_created",
+        "ix_todo_user_due",
+        "ix_todo_user_completed",
+        "ix_schedule_user_created",
+    }
+    for table in (Todo.__table__, Schedule.__table__):
+        for index in table.indexes:
+            if index.name in names:
+                index.create(connection, checkfirst=True)
+
+
+@migration(3, "image_filename holds any number of screenshot keys")
+def _image_filename_text(connection):
+    # SQLite doesn't enforce VARCHAR lengths, other databases rejected
+    # uploads of more than four screenshots
+    if connection.dialect.name == "sqlite":
+        return
+    for table in (Schedule.__table__, OCRJob.__table__):
+        if connection.dialect.name in ("mysql", "mariadb"):
+            change = "MODIFY image_filename TEXT"
+        else:
+            change = "ALTER COLUMN image_filename TYPE TEXT"
+        connection.exec_driver_sql(f"ALTER TABLE {table.name} {change}")
+
+
+# pg_advisory_xact_lock key held while migrating, any constant will do
+POSTGRES_LOCK_KEY = 7_316_402
+
+
+@contextmanager
+def _migration_lock(connection, timeout):
+    """
+    Hold the database's lock for schema changes, so only one process
+    migrates at a time and the others wait for it to finish. SQLite takes
+    its write lock with BEGIN IMMEDIATE, PostgreSQL an advisory lock and
+    MySQL a named lock.
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                connection.exec_driver_sql("BEGIN IMMEDIATE")
+                break
+            except OperationalError as e:
+                connection.rollback()
+                # Past the busy timeout, another process is still migrating
+                if "locked" not in str(e) or time.monotonic() > deadline:
+                    raise
+        yield
+    elif dialect == "postgresql":
+        # Released when the transaction ends
+        connection.execute(
+            sa.text("SELECT pg_advisory_xact_lock(:key)"), {"key": POSTGRES_LOCK_KEY}
+        )
+        yield
+    elif dialect in ("mysql", "mariadb"):
+        got = connection.scalar(
+            sa.text("SELECT GET_LOCK('schema_migrations', :timeout)"),
+            {"timeout": timeout},
+        )
+        if got != 1:
+            raise TimeoutError("Timed out waiting for another process to migrate")
+        try:
+            yield
+        finally:
+            connection.exec_driver_sql("SELECT RELEASE_LOCK('schema_migrations')")
+    else:
+        yield
+
+
+def upgrade(engine, lock_timeout=600):
+    """
+    Apply every migration the database hasn't had yet, in order, in one
+    transaction. Returns [(version, description)] of those applied.
+
+    Runs under a database lock (see _migration_lock) and reads the applied
+    versions only once it holds it, so when several workers start at once
+    one migrates and the rest find everything already applied.
+    """
+    with engine.connect() as connection:
+        with _migration_lock(connection, lock_timeout):
+            schema_migrations.create(connection, checkfirst=True)
+            done = set(connection.scalars(sa.select(schema_migrations.c.version)))
+
+            applied = []
+            for version, description, apply in MIGRATIONS:
+                if version in done:
+                    continue
+                apply(connection)
+                connection.execute(
+                    schema_migrations.insert().values(
+                        version=version,
+                        description=description,
+                        applied_at=datetime.now(timezone.utc),
+                    )
+                )
+                applied.append((version, description))
+            connection.commit()
+
+    for version, description in applied:
+        print(f"Applied migration {version}: {description}")
+    return applied
+
+
+def main():
+    """
+    Migrate the database config.DATABASE_URL points to, without importing
+    the web app (and its OCR model). Used as the Procfile release step.
+    """
+    import config
+    import database
+    from flask import Flask
+
+    # Next to app.py, so a relative SQLite path lands in the same instance
+    # folder
+    app = Flask(__name__)
+    database.init_app(
+        app,
+        db,
+        config.DATABASE_URL,
+        busy_timeout_ms=config.SQLITE_BUSY_TIMEOUT_MS,
+        mmap_size=config.SQLITE_MMAP_MB * 1024 * 1024,
+    )
+    with app.app_context():
+        if not upgrade(db.engine):
+            print("Database is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,14 @@ class Todo(db.Model):
     due = db.Column(db.Date)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
 
+    # One per sort order of the task list, so a user's tasks come straight
+    # out of the index already sorted (added by migration 2)
+    __table_args__ = (
+        db.Index("ix_todo_user_created", "user_id", "date_created"),
+        db.Index("ix_todo_user_due", "user_id", "due"),
+        db.Index("ix_todo_user_completed", "user_id", "completed"),
+    )
+
     def __repr__(self):
         return f"<Task {self.id}>"
 
@@ -43,9 +51,52 @@ class Schedule(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     week_start_date = db.Column(db.Date, nullable=False)
-    image_filename = db.Column(db.String(200))
+    # comma-separated upload store keys, one per screenshot
+    image_filename = db.Column(db.Text)
     parsed_data = db.Column(db.JSON)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
+    # The schedules list, newest first (added by migration 2)
+    __table_args__ = (db.Index("ix_schedule_user_created", "user_id", "created_at"),)
+
     def __repr__(self):
         return f"<Schedule {self.id} - Week of {self.week_start_date}>"
+
+
+# The columns the task list and schedules list show. Selecting only these
+# gives plain rows instead of ORM objects the session has to track, and
+# leaves each schedule's parsed_data JSON in the database.
+TASK_LIST_COLUMNS = (Todo.id, Todo.content, Todo.completed, Todo.date_created, Todo.due)
+SCHEDULE_LIST_COLUMNS = (Schedule.id, Schedule.week_start_date, Schedule.created_at)
+
+
+class StoredUpload(db.Model):
+    # content hash + extension, the file's name in the upload store
+    key = db.Column(db.String(64), primary_key=True)
+    # how many schedules point to this file
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+    size_bytes = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<StoredUpload {self.key} x{self.refcount}>"
+
+
+class OCRJob(db.Model):
+    # uuid hex, so job ids can't be guessed from the status URL
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    # queued -> running -> done / failed
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    week_start_date = db.Column(db.Date, nullable=False)
+    # comma-separated upload store keys, one per screenshot
+    image_filename = db.Column(db.Text)
+    schedule_id = db.Column(db.Integer, db.ForeignKey("schedule.id"), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    # per-image and total OCR timing for multi-screenshot uploads
+    timings = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<OCRJob {self.id} - {self.status}>"
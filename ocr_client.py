@@ -0,0 +1,124 @@
+import base64
+import json
+import urllib.error
+import urllib.request
+
+from debug_capture import NULL_CAPTURE
+from ocr_metrics import NULL_TIMER
+
+
+class OCRServiceError(Exception):
+    """Raised when the OCR server rejects or fails a parse request."""
+
+
+class OCRClient:
+    """
+    Drop-in stand-in for ScheduleParser that sends images to ocr_server.py.
+
+    Web workers using this never import easyocr or torch, so they stay at
+    plain Flask size. A sampled capture session asks the server to keep the
+    job's debug artifacts, on the server's disk.
+    """
+
+    def __init__(self, base_url, timeout=120):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _get_json(self, path):
+        """
+        GET path and decode the JSON body, also of error responses. Raises
+        OCRServiceError when the server is down or doesn't answer with JSON.
+        """
+        try:
+            with urllib.request.urlopen(self.base_url + path, timeout=5) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                return json.loads(e.read())
+            except ValueError:
+                raise OCRServiceError(f"OCR server error ({e.code})") from e
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise OCRServiceError(f"OCR server unreachable: {e}") from e
+
+    def health(self):
+        """
+        The server's /healthz stats plus up (whether it answered at all), so
+        status pages and metrics scrapes still work while it's down.
+        """
+        try:
+            health = self._get_json("/healthz")
+        except OCRServiceError as e:
+            return {"up": False, "ready": False, "error": str(e)}
+        health["up"] = True
+        return health
+
+    def status(self):
+        return self.health()
+
+    def is_ready(self):
+        try:
+            return self._get_json("/readyz").get("ready", False)
+        except OCRServiceError:
+            return False
+
+    def parse_schedule(
+        self, image, debug=False, timer=NULL_TIMER, capture=NULL_CAPTURE
+    ):
+        if isinstance(image, (bytes, bytearray)):
+            image_bytes = bytes(image)
+        else:
+            with open(image, "rb") as f:
+                image_bytes = f.read()
+
+        return self.parse_schedule_bytes(
+            image_bytes, debug=debug, timer=timer, capture=capture
+        )
+
+    def parse_schedule_bytes(
+        self, image_bytes, debug=False, timer=NULL_TIMER, capture=NULL_CAPTURE
+    ):
+        debug = debug or capture.enabled
+        capture.log(f"Parsed by {self.base_url}, debug artifacts are kept there")
+        with timer.stage("ocr_server"):
+            response = self._post(
+                f"/parse?debug={int(debug)}", image_bytes, "application/octet-stream"
+            )
+        if timer.enabled:
+            timer.timings.update(response.get("stages") or {})
+        return response["schedule"]
+
+    def parse_schedules_batch(
+        self, images, debug=False, timer=NULL_TIMER, capture=NULL_CAPTURE
+    ):
+        capture.log(f"Parsed by {self.base_url}, debug artifacts are kept there")
+        body = json.dumps(
+            {
+                "images": [base64.b64encode(image).decode("ascii") for image in images],
+                "debug": debug or capture.enabled,
+            }
+        ).encode("utf-8")
+        with timer.stage("ocr_server"):
+            response = self._post("/parse-batch", body, "application/json")
+        if timer.enabled:
+            timer.timings.update(response.get("stages") or {})
+        return response["schedule"], response["timings"]
+
+    def _post(self, path, body, content_type):
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=body,
+            headers={"Content-Type": content_type},
+            method="POST",
+        )
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise OCRServiceError(f"OCR server error ({e.code}): {message}") from e
+        except urllib.error.URLError as e:
+            raise OCRServiceError(f"OCR server unreachable: {e.reason}") from e
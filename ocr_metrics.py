@@ -0,0 +1,132 @@
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class StageTimer:
+    """
+    Collects how long each named stage of one OCR parse took, in seconds.
+
+        timer = StageTimer()
+        with timer.stage("detect"):
+            ...
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def as_ms(self):
+        return {name: round(secs * 1000, 1) for name, secs in self.timings.items()}
+
+    def server_timing(self):
+        """
+        Format as a Server-Timing header value, e.g. "detect;dur=812.4, ..."
+        """
+        return server_timing_header(self.as_ms())
+
+
+class _NullTimer:
+    """
+    Stand-in used when timing is off, so the parser can always call
+    timer.stage() without checking. Every stage shares one no-op context.
+    """
+
+    enabled = False
+    timings = {}
+    _context = nullcontext()
+
+    def stage(self, name):
+        return self._context
+
+    def as_ms(self):
+        return {}
+
+
+NULL_TIMER = _NullTimer()
+
+
+def server_timing_header(durations_ms):
+    return ", ".join(f"{name};dur={ms}" for name, ms in durations_ms.items())
+
+
+# Upper bounds in seconds, OCR stages range from a few ms to tens of seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class StageHistograms:
+    """
+    Per-stage latency histograms, rendered in the Prometheus text format.
+
+    Counts are kept per process, so with several gunicorn workers each one
+    reports its own share.
+    """
+
+    def __init__(self, name="ocr_stage_seconds", buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counts = {}  # stage -> count per bucket, last one is +Inf
+        self._sums = {}
+
+    def observe(self, timings):
+        with self._lock:
+            for stage, secs in timings.items():
+                counts = self._counts.setdefault(stage, [0] * (len(self.buckets) + 1))
+                for i, bound in enumerate(self.buckets):
+                    if secs <= bound:
+                        counts[i] += 1
+                        break
+                else:
+                    counts[-1] += 1
+                self._sums[stage] = self._sums.get(stage, 0.0) + secs
+
+    def render_prometheus(self):
+        lines = [
+            f"# HELP {self.name} Time spent in each OCR pipeline stage.",
+            f"# TYPE {self.name} histogram",
+        ]
+
+        with self._lock:
+            for stage in sorted(self._counts):
+                counts = self._counts[stage]
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(
+                        f'{self.name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}'
+                    )
+                cumulative += counts[-1]
+                lines.append(
+                    f'{self.name}_bucket{{stage="{stage}",le="+Inf"}} {cumulative}'
+                )
+                lines.append(
+                    f'{self.name}_sum{{stage="{stage}"}} {self._sums[stage]:.6f}'
+                )
+                lines.append(f'{self.name}_count{{stage="{stage}"}} {cumulative}')
+
+        return "\n".join(lines) + "\n"
+
+
+def render_gauges(values, prefix="ocr_"):
+    """
+    Render a flat {name: number} dict as Prometheus gauges, skipping Nones.
+    """
+    lines = []
+    for name, value in values.items():
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            lines.append(f"# TYPE {prefix}{name} gauge")
+            lines.append(f"{prefix}{name} {value}")
+    return "\n".join(lines) + "\n" if lines else ""
@@ -0,0 +1,396 @@
+"""
+Standalone OCR service.
+
+Holds a single ScheduleParser (one copy of the EasyOCR weights) and serves
+parse requests from every gunicorn worker over localhost HTTP:
+
+    POST /parse?debug=1   body = raw image bytes  -> {"schedule": {...}}
+                          (debug=1 always keeps the debug artifacts)
+    POST /parse-batch     body = {"images": [base64, ...], "debug": false}
+                          -> {"schedule": {...}, "timings": {...}}
+    GET  /healthz         always 200 while the process is up, with stats
+    GET  /readyz          200 once the model is loaded, 503 before that
+    GET  /metrics         per-stage latency histograms (Prometheus text format)
+
+Run it next to the web app:
+
+    python ocr_server.py --port 8765
+
+and point the web app at it with OCR_SERVER_URL=http://127.0.0.1:8765
+"""
+
+import argparse
+import base64
+import json
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from debug_capture import DebugCapture
+from ocr_metrics import StageHistograms, StageTimer, render_gauges
+
+
+class ServerBusyError(Exception):
+    """Raised when max_in_flight parse requests are already queued or running."""
+
+
+class _ParseRequest:
+    def __init__(self, images, debug):
+        self.images = images
+        self.debug = debug
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class OCRService:
+    """
+    Owns the model and a single inference thread.
+
+    Requests are queued and the inference thread drains up to batch_size of
+    them at a time (waiting at most batch_wait seconds for the batch to fill),
+    so the model is only ever used from one thread.
+
+    A lone request gets the full single-image path (grid fast path, adaptive
+    passes). When several are drained together, all of their screenshots go
+    through one batched detection and recognition pass, read the way
+    multi-screenshot uploads are (see ScheduleParser.parse_schedule_groups).
+    """
+
+    def __init__(self, batch_size=4, batch_wait=0.05, max_in_flight=16, threads=None):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.max_in_flight = max_in_flight
+        # The server is the only OCR user on its box, so by default torch and
+        # OpenCV keep one thread per core
+        self.threads = threads
+
+        self.parser = None
+        self.ready = False
+        self.load_error = None
+        self.started_at = time.time()
+        self.load_seconds = None
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.stats = {
+            "requests": 0,
+            "failed": 0,
+            "rejected": 0,
+            "batches": 0,
+            # requests parsed in a shared pass with others
+            "batched": 0,
+        }
+        self.metrics = StageHistograms()
+        self.debug_capture = None
+
+    def start(self):
+        threading.Thread(target=self._run, name="ocr-model", daemon=True).start()
+
+    def _load_model(self):
+        import config
+        from ocr_cache import OCRCache
+        from parser import ScheduleParser
+
+        self.debug_capture = DebugCapture(
+            config.DEBUG_CAPTURE_DIR,
+            sample_rate=config.DEBUG_CAPTURE_RATE,
+            keep=config.DEBUG_CAPTURE_KEEP,
+        )
+
+        print("Loading OCR model (this may take a moment)...")
+        cache = OCRCache(
+            config.OCR_CACHE_DIR, max_bytes=config.OCR_CACHE_MAX_MB * 1024 * 1024
+        )
+        self.parser = ScheduleParser(
+            cache=cache,
+            grid_fast_path=config.OCR_GRID_FAST_PATH,
+            quantize=config.OCR_QUANTIZE,
+            threads=self.threads,
+            interop_threads=config.OCR_INTEROP_THREADS,
+            adaptive=config.OCR_ADAPTIVE,
+            min_confidence=config.OCR_MIN_CONFIDENCE,
+            vocabulary=config.OCR_VOCABULARY,
+            tiling=config.OCR_TILING,
+            tile_workers=config.OCR_TILE_WORKERS,
+        )
+        self.parser.load_reader()
+        self.load_seconds = self.parser.load_seconds
+        self.ready = True
+        print("Serving OCR requests.")
+
+    def parse(self, images, debug=False, timeout=None):
+        """
+        Queue one schedule (a list of one or more screenshots) and block until
+        the inference thread has parsed it.
+
+        Returns (schedule, timings, stages): timings is the multi-image report
+        from parse_schedules_batch (None for one image), stages the per-stage
+        seconds.
+        """
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                self.stats["rejected"] += 1
+                raise ServerBusyError(f"{self._in_flight} requests already in flight")
+            self._in_flight += 1
+
+        try:
+            request = _ParseRequest(images, debug)
+            self._queue.put(request)
+            if not request.done.wait(timeout):
+                raise TimeoutError("OCR request timed out")
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        try:
+            self._load_model()
+        except Exception as e:
+            self.load_error = str(e)
+            print(f"❌ Failed to load OCR model: {e}")
+            return
+
+        while True:
+            batch = self._next_batch()
+            self._parse_batch(batch)
+
+            with self._lock:
+                self.stats["batches"] += 1
+                self.stats["requests"] += len(batch)
+                self.stats["failed"] += sum(1 for r in batch if r.error)
+
+    def _parse_batch(self, batch):
+        if len(batch) > 1:
+            try:
+                self._parse_together(batch)
+                return
+            except Exception as e:
+                print(f"Batched OCR pass failed, parsing one at a time: {e}")
+
+        for request in batch:
+            try:
+                request.result = self._parse_one(request.images, request.debug)
+            except Exception as e:
+                request.error = e
+            finally:
+                request.done.set()
+
+    def _parse_together(self, batch):
+        """
+        Parse every request of batch in one detection/recognition pass.
+        Requests that fail on their own (a corrupt image) get their error;
+        a failure of the shared pass is raised, before any request is done.
+        """
+        timer = StageTimer()
+        captures = [self.debug_capture.start(force=r.debug) for r in batch]
+        outcomes = self.parser.parse_schedule_groups(
+            [request.images for request in batch], timer=timer, captures=captures
+        )
+
+        for request, capture, outcome in zip(batch, captures, outcomes):
+            if isinstance(outcome, Exception):
+                capture.close(error=str(outcome))
+                request.error = outcome
+            else:
+                capture.close()
+                schedule, timings = outcome
+                # Every request waited on the whole pass, that's its latency
+                self.metrics.observe(timer.timings)
+                request.result = (
+                    schedule,
+                    timings if len(request.images) > 1 else None,
+                    timer.timings,
+                )
+            request.done.set()
+
+        with self._lock:
+            self.stats["batched"] += len(batch)
+
+    def _parse_one(self, images, debug):
+        timer = StageTimer()
+        capture = self.debug_capture.start(force=debug)
+
+        try:
+            if len(images) == 1:
+                schedule = self.parser.parse_schedule_bytes(
+                    images[0], timer=timer, capture=capture
+                )
+                timings = None
+            else:
+                schedule, timings = self.parser.parse_schedules_batch(
+                    images, timer=timer, capture=capture
+                )
+        except Exception as e:
+            capture.close(error=str(e))
+            raise
+        capture.close()
+
+        self.metrics.observe(timer.timings)
+        return schedule, timings, timer.timings
+
+    def health(self):
+        with self._lock:
+            in_flight = self._in_flight
+            stats = dict(self.stats)
+
+        return {
+            "ready": self.ready,
+            "load_error": self.load_error,
+            "load_seconds": self.load_seconds,
+            "cold_start_seconds": self.parser and self.parser.cold_start_seconds,
+            "cache": self.parser and self.parser.cache.stats(),
+            "model": self.parser and self.parser.model_info,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "in_flight": in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": self._queue.qsize(),
+            "batch_size": self.batch_size,
+            "debug_capture": self.debug_capture and self.debug_capture.stats,
+            **stats,
+        }
+
+
+class OCRRequestHandler(BaseHTTPRequestHandler):
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        service = self.server.service
+        path = urlparse(self.path).path
+
+        if path == "/healthz":
+            self._send_json(200, service.health())
+        elif path == "/readyz":
+            self._send_json(200 if service.ready else 503, {"ready": service.ready})
+        elif path == "/metrics":
+            health = service.health()
+            cache = health.pop("cache") or {}
+            model = health.pop("model") or {}
+            capture = health.pop("debug_capture") or {}
+            body = service.metrics.render_prometheus()
+            body += render_gauges(health)
+            body += render_gauges(cache, prefix="ocr_cache_")
+            body += render_gauges(model, prefix="ocr_model_")
+            body += render_gauges(capture, prefix="ocr_debug_capture_")
+
+            payload = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        service = self.server.service
+        url = urlparse(self.path)
+
+        if url.path not in ("/parse", "/parse-batch"):
+            self._send_json(404, {"error": "not found"})
+            return
+
+        if not service.ready:
+            self._send_json(503, {"error": "OCR model is still loading"})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        if length <= 0:
+            self._send_json(400, {"error": "empty image"})
+            return
+
+        body = self.rfile.read(length)
+
+        if url.path == "/parse-batch":
+            try:
+                payload = json.loads(body)
+                images = [base64.b64decode(image) for image in payload["images"]]
+                debug = bool(payload.get("debug", False))
+            except (ValueError, KeyError, TypeError):
+                self._send_json(400, {"error": "expected {\"images\": [base64, ...]}"})
+                return
+        else:
+            images = [body]
+            debug = parse_qs(url.query).get("debug", ["0"])[0] == "1"
+
+        try:
+            schedule, timings, stages = service.parse(images, debug=debug)
+        except ServerBusyError as e:
+            self._send_json(503, {"error": str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+
+        self._send_json(
+            200, {"schedule": schedule, "timings": timings, "stages": stages}
+        )
+
+    def log_message(self, format, *args):
+        # Only log failures, the web app already logs every upload
+        if args and str(args[1]).startswith(("4", "5")):
+            super().log_message(format, *args)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Shared OCR model server")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument(
+        "--port", type=int, default=int(os.environ.get("OCR_SERVER_PORT", 8765))
+    )
+    arg_parser.add_argument("--batch-size", type=int, default=4)
+    arg_parser.add_argument("--batch-wait-ms", type=int, default=50)
+    arg_parser.add_argument("--max-in-flight", type=int, default=16)
+    arg_parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="CPU threads for torch/OpenCV (default: one per core)",
+    )
+    args = arg_parser.parse_args()
+
+    service = OCRService(
+        batch_size=args.batch_size,
+        batch_wait=args.batch_wait_ms / 1000,
+        max_in_flight=args.max_in_flight,
+        threads=args.threads,
+    )
+    service.start()
+
+    httpd = ThreadingHTTPServer((args.host, args.port), OCRRequestHandler)
+    httpd.service = service
+    print(f"OCR server listening on http://{args.host}:{args.port}")
+    httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
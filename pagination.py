@@ -0,0 +1,154 @@
+import base64
+import json
+from datetime import date, datetime
+
+
+class Page:
+    """
+    One page of a keyset-paginated query. next_cursor / prev_cursor are the
+    tokens for the pages after and before it, None at either end.
+    """
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+
+def nulls_sort_first(dialect):
+    """
+    Whether the database puts NULLs before other values in ascending order
+    (SQLite and MySQL do, PostgreSQL puts them last). Queries keep the
+    database's own placement so they can read straight from an index.
+    """
+    return dialect.name in ("sqlite", "mysql", "mariadb")
+
+
+def encode_cursor(value, row_id):
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    token = json.dumps([value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, column):
+    """
+    (value, id) from a cursor token, value converted to column's type.
+    Raises ValueError for a token that wasn't made by encode_cursor.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if value is not None:
+            python_type = column.type.python_type
+            if python_type in (date, datetime):
+                value = python_type.fromisoformat(value)
+            else:
+                value = python_type(value)
+        return value, int(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor {token!r}") from e
+
+
+def _ordered(query, column, id_column, descending):
+    if descending:
+        return query.order_by(column.desc(), id_column.desc())
+    return query.order_by(column.asc(), id_column.asc())
+
+
+def _segments(query, column, id_column, descending, key, nulls_lead):
+    """
+    The queries that together return the rows after key in scan order, in
+    that order. Each is a single range of the (column, id) index, which one
+    query with ORs across them would not be: the rest of the rows tied with
+    key, then those with later values, and the NULLs on whichever side of
+    the values they sort.
+    """
+    before_id = id_column < key[1] if descending else id_column > key[1]
+    if key[0] is None:
+        yield query.filter(column.is_(None), before_id)
+        if nulls_lead:
+            yield query.filter(column.isnot(None))
+        return
+
+    yield query.filter(column == key[0], before_id)
+    yield query.filter(column < key[0] if descending else column > key[0])
+    if not nulls_lead:
+        yield query.filter(column.is_(None))
+
+
+def _scan(query, column, id_column, descending, key, limit, nulls_first):
+    """
+    Up to limit rows following key (from the start without one), in
+    (column, id) order.
+    """
+    if key is None:
+        return _ordered(query, column, id_column, descending).limit(limit).all()
+
+    # Whether the NULLs come before the values in this direction
+    nulls_lead = nulls_first != descending
+    rows = []
+    for segment in _segments(query, column, id_column, descending, key, nulls_lead):
+        rows += (
+            _ordered(segment, column, id_column, descending)
+            .limit(limit - len(rows))
+            .all()
+        )
+        if len(rows) == limit:
+            break
+    return rows
+
+
+def keyset_page(
+    query,
+    column,
+    id_column,
+    descending=False,
+    page_size=50,
+    after=None,
+    before=None,
+    nulls_first=True,
+):
+    """
+    The page of query, ordered by column then id_column, following the
+    cursor after or preceding the cursor before (the first page with
+    neither).
+
+    Each page is found by seeking to its first row's (column, id) key
+    instead of counting past an offset, so it costs the same however deep
+    it is and doesn't shift when rows are added before it. nulls_first is
+    the database's NULL placement, see nulls_sort_first.
+    """
+    cursor = before if before is not None else after
+    key = decode_cursor(cursor, column) if cursor is not None else None
+
+    if before is not None:
+        # Walk backwards from before, then put the page back in order
+        rows = _scan(
+            query, column, id_column, not descending, key, page_size + 1, nulls_first
+        )
+        items = rows[:page_size][::-1]
+        has_prev, has_next = len(rows) > page_size, True
+    else:
+        rows = _scan(
+            query, column, id_column, descending, key, page_size + 1, nulls_first
+        )
+        items = rows[:page_size]
+        has_prev, has_next = key is not None, len(rows) > page_size
+
+    if not items:
+        if key is not None:
+            # Everything on that side of the cursor is gone, start over
+            return keyset_page(
+                query, column, id_column, descending, page_size, nulls_first=nulls_first
+            )
+        return Page([])
+
+    def cursor_of(item):
+        return encode_cursor(getattr(item, column.key), getattr(item, id_column.key))
+
+    return Page(
+        items,
+        next_cursor=cursor_of(items[-1]) if has_next else None,
+        prev_cursor=cursor_of(items[0]) if has_prev else None,
+    )
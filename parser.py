@@ -1,48 +1,576 @@
+import bisect
 import cv2
-import easyocr
+import functools
+import hashlib
+import io
 import numpy as np
 import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from debug_capture import ECHO_CAPTURE, NULL_CAPTURE
+from ocr_metrics import NULL_TIMER
+from regions import RegionRows, RegionTable
+
+# Bump whenever a change to the parser would change its output, so results
+# cached by an older version aren't served again.
+PARSER_VERSION = 2
+
+
+DAYS_ORDER = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+DAY_VARIATIONS = {
+    "Monday": "Mon",
+    "Mon": "Mon",
+    "Tuesday": "Tue",
+    "Tue": "Tue",
+    "Tues": "Tue",
+    "Wednesday": "Wed",
+    "Wed": "Wed",
+    "Thursday": "Thu",
+    "Thu": "Thu",
+    "Thurs": "Thu",
+    "Friday": "Fri",
+    "Fri": "Fri",
+    "Saturday": "Sat",
+    "Sat": "Sat",
+    "Sunday": "Sun",
+    "Sun": "Sun",
+}
+
+# Everything a schedule screenshot is expected to say, besides numbers
+SCHEDULE_VOCABULARY = list(DAY_VARIATIONS) + ["Not Scheduled", "Off", "am", "pm"]
+
+# Characters the recognizer may output in vocabulary mode: the vocabulary's
+# letters in either case, digits and the punctuation used in dates and
+# times. Anything else it sees (month names, app chrome) comes out as the
+# nearest allowed characters, which the tokenizer then ignores.
+SCHEDULE_ALLOWLIST = "".join(
+    sorted(
+        set("".join(SCHEDULE_VOCABULARY).lower())
+        | set("".join(SCHEDULE_VOCABULARY).upper())
+        | set("0123456789 -:./,")
+    )
+)
+
+# Row tokenizer patterns, compiled once instead of on every row.
+# Common OCR mistakes: Iam/iam/lam -> 1am, Ipm/lpm -> 1pm. Still needed in
+# vocabulary mode, i and l are in "Friday" and "Scheduled", but there these
+# are the only letters a 1 can be misread as.
+OCR_FIXUP_PATTERN = re.compile(r"\b[il]([ap])m\b", re.IGNORECASE)
+DAY_PATTERN = re.compile(
+    r"\b(" + "|".join(sorted(DAY_VARIATIONS, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+DAY_LOOKUP = {variant.lower(): day for variant, day in DAY_VARIATIONS.items()}
+DATE_PATTERN = re.compile(r"\b(\d{1,2})\b")
+TIME_PATTERNS = [
+    re.compile(
+        r"(\d{1,2})\s*(?:a\.?m\.?|p\.?m\.?)\s*[-–—:]\s*(\d{1,2})\s*(a\.?m\.?|p\.?m\.?)",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"(\d{1,2})\s*(a\.?m\.?|p\.?m\.?)\s+(\d{1,2})\s*(a\.?m\.?|p\.?m\.?)",
+        re.IGNORECASE,
+    ),
+]
+NOT_SCHEDULED_PATTERN = re.compile(r"Not\s+Scheduled", re.IGNORECASE)
+
+RowTokens = namedtuple(
+    "RowTokens", ["text", "day", "date", "time_range", "corrected_from", "not_scheduled"]
+)
+
+
+def _time_range_from_match(time_match, pattern_index):
+    """
+    Normalize a matched time range to e.g. "2am - 11am".
+
+    Returns (time_range, corrected_from), where corrected_from is the original
+    end hour when it was OCR-corrected to 11, else None.
+    """
+    start_hour = time_match.group(1)
+
+    if pattern_index == 0:
+        end_hour = time_match.group(2)
+        end_period_raw = time_match.group(3)
+    else:
+        end_hour = time_match.group(3)
+        end_period_raw = time_match.group(4)
+
+    end_period = end_period_raw.replace(".", "").strip().lower()
+
+    matched_text = time_match.group(0).lower()
+    first_time_part = (
+        matched_text.split()[0]
+        if " " in matched_text
+        else matched_text[: len(start_hour) + 3]
+    )
+
+    start_period = (
+        "pm" if ("pm" in first_time_part or "p.m" in first_time_part) else "am"
+    )
+
+    # OCR CORRECTION: "2am - 1am" is really "2am - 11am"
+    corrected_from = None
+    if (
+        int(end_hour) == 1
+        and end_period == "am"
+        and int(start_hour) >= 2
+        and start_period == "am"
+    ):
+        corrected_from = end_hour
+        end_hour = "11"
+
+    return f"{start_hour}{start_period} - {end_hour}{end_period}", corrected_from
+
+
+def tokenize_row(row_text):
+    """
+    Find the day, date, time range and "Not Scheduled" marker in one row.
+
+    Every pattern is precompiled and scans the row once. Precedence matches
+    the original rules: the earliest weekday wins when several day names
+    appear, and the dash-separated time pattern wins over the space-separated
+    one.
+    """
+    row_text = OCR_FIXUP_PATTERN.sub(
+        lambda m: "1" + m.group(1).lower() + "m", row_text
+    )
+
+    day = None
+    for match in DAY_PATTERN.finditer(row_text):
+        candidate = DAY_LOOKUP[match.group(1).lower()]
+        if day is None or DAYS_ORDER.index(candidate) < DAYS_ORDER.index(day):
+            day = candidate
+
+    date_match = DATE_PATTERN.search(row_text)
+    date = None
+    if date_match and 1 <= int(date_match.group(1)) <= 31:
+        date = int(date_match.group(1))
+
+    time_range = corrected_from = None
+    for pattern_index, pattern in enumerate(TIME_PATTERNS):
+        time_match = pattern.search(row_text)
+        if time_match:
+            time_range, corrected_from = _time_range_from_match(
+                time_match, pattern_index
+            )
+            break
+
+    not_scheduled = NOT_SCHEDULED_PATTERN.search(row_text) is not None
+
+    return RowTokens(row_text, day, date, time_range, corrected_from, not_scheduled)
+
+
+def _decode_image(source):
+    """
+    Decode a BGR image from encoded bytes, or pass an ndarray straight through.
+    """
+    if isinstance(source, np.ndarray):
+        if source.ndim == 2:
+            return cv2.cvtColor(source, cv2.COLOR_GRAY2BGR)
+        return source
 
+    img = cv2.imdecode(np.frombuffer(source, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Could not decode image")
+    return img
 
-class ScheduleParser:
-    def __init__(self):
-        self.reader = easyocr.Reader(["en"], gpu=False)
 
-    def preprocess_image(self, image_path):
+def _read_source(image):
+    """
+    Turn a path, bytes or ndarray into something PreprocessPipeline can decode,
+    reading a file from disk at most once.
+    """
+    if isinstance(image, (bytes, bytearray, memoryview, np.ndarray)):
+        return image
+    with open(image, "rb") as f:
+        return f.read()
+
+
+def _adaptive_threshold(image):
+    return cv2.adaptiveThreshold(
+        image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+    )
+
+
+def _downscale_binary(binary, levels, keep_dark=False):
+    """
+    Shrink a 0/255 image by 2**levels on each side.
+
+    Pixels are sampled (nearest neighbour) by default. With keep_dark a
+    block turns black if any pixel in it is, so one-pixel lines survive.
+    """
+    if levels <= 0:
+        return binary
+
+    height, width = binary.shape[:2]
+    size = (max(1, width >> levels), max(1, height >> levels))
+    if not keep_dark:
+        return cv2.resize(binary, size, interpolation=cv2.INTER_NEAREST)
+
+    # INTER_AREA averages each block, only all-white blocks stay at 255
+    shrunk = cv2.resize(binary, size, interpolation=cv2.INTER_AREA)
+    return cv2.threshold(shrunk, 254, 255, cv2.THRESH_BINARY)[1]
+
+
+def _quantize_dynamic(model):
+    """
+    Swap a torch model's LSTM and Linear layers for int8 dynamically
+    quantized ones, in place. Returns how many layers were swapped.
+
+    Convolutions can't be quantized dynamically, so a conv-only network
+    (like the CRAFT detector) is left as it is.
+    """
+    import torch
+
+    torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.LSTM, torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+    return sum(
+        1
+        for module in model.modules()
+        if ".quantized.dynamic" in type(module).__module__
+    )
+
+
+def configure_threads(threads=None, interop_threads=None):
+    """
+    Cap the CPU threads torch and OpenCV use in this process.
+
+    Both default to one thread per core, so several workers parsing at once
+    on the same machine end up fighting over the CPU. Imports torch.
+    """
+    import torch
+
+    if threads:
+        cv2.setNumThreads(threads)
+        torch.set_num_threads(threads)
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError as e:
+            # Only allowed before torch runs any inter-op parallel work
+            print(f"Could not set torch inter-op threads: {e}")
+
+
+def _model_size_mb(model):
+    """
+    Size of a torch model's weights, serialized, in MB.
+    """
+    import torch
+
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return round(buffer.tell() / (1024 * 1024), 2)
+
+
+SHARPEN_KERNEL = np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]])
+
+# Longest side of the downscaled image the first adaptive OCR pass detects on
+FAST_DETECTION_MAX_SIDE = 1280
+
+
+def _fast_detection_input(gray):
+    """
+    Cheapest input for the text detector: the grayscale, shrunk so its long
+    side is at most FAST_DETECTION_MAX_SIDE. Returns (RGB image, scale).
+    """
+    scale = min(1.0, FAST_DETECTION_MAX_SIDE / max(gray.shape[:2]))
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB), scale
+
+
+def _tile_spans(height, tile_height, overlap):
+    """
+    Split height rows into horizontal strips of tile_height rows, each
+    overlapping the next by at least overlap rows.
+
+    Returns [(top, bottom, own_top, own_bottom)]. A strip owns the rows from
+    the middle of the overlap above it to the middle of the overlap below
+    it, so every row belongs to exactly one strip.
+    """
+    if height <= tile_height:
+        return [(0, height, 0, height)]
+
+    step = tile_height - overlap
+    tops = list(range(0, height - tile_height, step)) + [height - tile_height]
+    bottoms = [top + tile_height for top in tops]
+
+    boundaries = [0]
+    boundaries += [(tops[i + 1] + bottoms[i]) // 2 for i in range(len(tops) - 1)]
+    boundaries.append(height)
+
+    return [
+        (top, bottom, boundaries[i], boundaries[i + 1])
+        for i, (top, bottom) in enumerate(zip(tops, bottoms))
+    ]
+
+
+def _box_from_corners(bbox):
+    """
+    [x_min, x_max, y_min, y_max] around a recognize() result's corners.
+    """
+    xs = [int(point[0]) for point in bbox]
+    ys = [int(point[1]) for point in bbox]
+    return [min(xs), max(xs), min(ys), max(ys)]
+
+
+class PreprocessPipeline:
+    """
+    Lazily evaluated preprocessing stages for one image.
+
+    Each stage is only computed the first time something asks for it (directly
+    or through a stage that depends on it) and is then reused. How long each
+    stage took is kept in self.timings.
+    """
+
+    # name -> (stages it depends on, function of those stages)
+    STAGES = {
+        "img": (("source",), _decode_image),
+        "gray": (("img",), lambda img: cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)),
+        # EasyOCR's detector expects RGB (it loads files with skimage)
+        "rgb": (("img",), lambda img: cv2.cvtColor(img, cv2.COLOR_BGR2RGB)),
+        # Option A: adaptive threshold on the plain grayscale
+        "thresh_adaptive": (("gray",), _adaptive_threshold),
+        # Option B: sharpen the image first
+        "sharpened": (("gray",), lambda gray: cv2.filter2D(gray, -1, SHARPEN_KERNEL)),
+        "thresh_sharpen": (("sharpened",), _adaptive_threshold),
+        # Option C: denoise first (slow on large screenshots)
+        "denoised": (
+            ("gray",),
+            lambda gray: cv2.fastNlMeansDenoising(gray, None, 10, 7, 21),
+        ),
+        "thresh_denoise": (("denoised",), _adaptive_threshold),
+        # Text detector inputs, each as (RGB image, scale relative to img)
+        "detect_full": (("rgb",), lambda rgb: (rgb, 1.0)),
+        "detect_fast": (("gray",), _fast_detection_input),
+        "detect_denoised": (
+            ("denoised",),
+            lambda denoised: (cv2.cvtColor(denoised, cv2.COLOR_GRAY2RGB), 1.0),
+        ),
+    }
+
+    # strategy name -> the threshold stage it ends in
+    STRATEGIES = {
+        "adaptive": "thresh_adaptive",
+        "sharpen": "thresh_sharpen",
+        "denoise": "thresh_denoise",
+    }
+
+    def __init__(self, source):
         """
-        Preprocess image to enhance text and detect structure.
+        source is encoded image bytes or an already decoded BGR ndarray.
         """
-        img = cv2.imread(image_path)
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        self.timings = {}
+        self._values = {"source": source}
 
-        # Try multiple preprocessing approaches
-        # Option A: Adaptive threshold (current)
-        thresh1 = cv2.adaptiveThreshold(
-            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
-        )
+    def get(self, name):
+        if name in self._values:
+            return self._values[name]
+
+        depends_on, func = self.STAGES[name]
+        inputs = [self.get(dep) for dep in depends_on]
+
+        start = time.perf_counter()
+        value = func(*inputs)
+        self.timings[name] = time.perf_counter() - start
+
+        self._values[name] = value
+        return value
+
+    def threshold(self, strategy="sharpen"):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown preprocessing strategy: {strategy}")
+        return self.get(self.STRATEGIES[strategy])
 
-        # Option B: Sharpen the image first
-        kernel = np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]])
-        sharpened = cv2.filter2D(gray, -1, kernel)
-        thresh2 = cv2.adaptiveThreshold(
-            sharpened, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+
+class ScheduleParser:
+    # Layout and line detection run on a downscaled copy of the threshold
+    # image, each level halves both sides. Ruled lines and layout blocks are
+    # many pixels long, so they survive the first level intact.
+    LAYOUT_PYRAMID_LEVEL = 1
+    TABLE_PYRAMID_LEVEL = 1
+
+    # Adaptive OCR passes, cheapest first, as (detector input stage,
+    # recognizer input stage) of PreprocessPipeline. A pass only runs when
+    # the one before it left days with neither a shift nor a day off and
+    # read some text below min_confidence.
+    ADAPTIVE_PASSES = [
+        ("detect_fast", "gray"),
+        ("detect_full", "gray"),
+        ("detect_denoised", "denoised"),
+    ]
+    # Preprocessing tried, in order, on regions read with low confidence
+    REGION_RETRY_STAGES = ["sharpened", "denoised"]
+
+    # Tiling: images taller than TILE_HEIGHT are read as strips of that many
+    # rows, overlapping by TILE_OVERLAP (more than twice the tallest text
+    # line, so every line is whole in the strip that owns it)
+    TILE_HEIGHT = 1600
+    TILE_OVERLAP = 200
+
+    def __init__(
+        self,
+        warm_up=False,
+        cache=None,
+        grid_fast_path=False,
+        quantize=False,
+        threads=None,
+        interop_threads=None,
+        adaptive=False,
+        min_confidence=0.5,
+        vocabulary=False,
+        tiling=False,
+        tile_workers=1,
+    ):
+        # The EasyOCR reader (and torch) is loaded on first use, so building
+        # a parser is instant and only OCR calls pay for the model.
+        self._reader = None
+        self._reader_lock = threading.Lock()
+        self._created_at = time.perf_counter()
+        self.load_seconds = None
+        self.cold_start_seconds = None
+        self.cache = cache
+        # Recognize only the cells of ruled tables, skipping the text detector
+        self.grid_fast_path = grid_fast_path
+        # int8 dynamic quantization of the models' LSTM/Linear layers (CPU)
+        self.quantize = quantize
+        self.model_info = None
+
+        # CPU threads for torch and OpenCV, None leaves the library defaults
+        # (one per core). Set by configure_threads when the model loads.
+        self.threads = threads
+        self.interop_threads = interop_threads
+
+        # Adaptive OCR: start from the cheapest input and only escalate to
+        # the expensive preprocessing where the first read isn't good enough
+        self.adaptive = adaptive
+        self.min_confidence = min_confidence
+
+        # Vocabulary mode: the recognizer may only output characters that
+        # occur in schedules (SCHEDULE_ALLOWLIST), decoded greedily
+        self.vocabulary = vocabulary
+        self.recognize_options = {"decoder": "greedy"}
+        if vocabulary:
+            self.recognize_options["allowlist"] = SCHEDULE_ALLOWLIST
+
+        # Read tall screenshots as overlapping strips, tile_workers at a time,
+        # instead of as one huge canvas (which the detector also shrinks)
+        self.tiling = tiling
+        self.tile_workers = max(1, tile_workers)
+
+        # The grid fast path, quantized models, adaptive OCR, vocabulary mode
+        # and tiling can read text slightly differently, so their results are
+        # cached separately
+        self.cache_version = "-".join(
+            [str(PARSER_VERSION)]
+            + (["grid"] if grid_fast_path else [])
+            + (["int8"] if quantize else [])
+            + (["adaptive"] if adaptive else [])
+            + (["vocab"] if vocabulary else [])
+            + (["tiled"] if tiling else [])
         )
 
-        # Option C: Denoise first
-        denoised = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
-        thresh3 = cv2.adaptiveThreshold(
-            denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+        if warm_up:
+            self.warm_up()
+
+    @property
+    def reader(self):
+        if self._reader is None:
+            self.load_reader()
+        return self._reader
+
+    def load_reader(self):
+        """
+        Load the EasyOCR model, blocking until it's ready.
+        """
+        with self._reader_lock:
+            if self._reader is None:
+                import easyocr
+
+                if self.threads or self.interop_threads:
+                    configure_threads(self.threads, self.interop_threads)
+
+                start = time.perf_counter()
+                # EasyOCR's own quantize option swallows any failure, so it is
+                # turned off and quantization is done (and checked) here
+                reader = easyocr.Reader(["en"], gpu=False, quantize=False)
+                self.model_info = {
+                    "quantized": self.quantize,
+                    "recognizer_quantized_layers": 0,
+                    "detector_quantized_layers": 0,
+                }
+                if self.quantize:
+                    self.model_info["recognizer_quantized_layers"] = _quantize_dynamic(
+                        reader.recognizer
+                    )
+                    self.model_info["detector_quantized_layers"] = _quantize_dynamic(
+                        reader.detector
+                    )
+                self.model_info["recognizer_mb"] = _model_size_mb(reader.recognizer)
+                self.model_info["detector_mb"] = _model_size_mb(reader.detector)
+
+                self._reader = reader
+                self.load_seconds = time.perf_counter() - start
+                print(
+                    f"OCR model loaded in {self.load_seconds:.1f}s"
+                    + (" (int8)" if self.quantize else "")
+                )
+
+        return self._reader
+
+    def warm_up(self):
+        """
+        Load the model on a background thread so the first upload doesn't wait.
+        """
+        thread = threading.Thread(
+            target=self.load_reader, name="ocr-warm-up", daemon=True
         )
+        thread.start()
+        return thread
+
+    def is_ready(self):
+        return self._reader is not None
+
+    def status(self):
+        return {
+            "ready": self.is_ready(),
+            "load_seconds": self.load_seconds,
+            "cold_start_seconds": self.cold_start_seconds,
+            "model": self.model_info,
+            "threads": self.threads,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
 
-        # For now, use the sharpened version
-        return img, gray, thresh2
+    def preprocess_image(self, image, strategy="sharpen"):
+        """
+        Preprocess image to enhance text and detect structure.
 
-    def detect_layout_type(self, thresh):
+        strategy picks which thresholded variant is returned, see
+        PreprocessPipeline.STRATEGIES. Only the stages it needs are run.
+        """
+        pipeline = PreprocessPipeline(_read_source(image))
+        return pipeline.get("img"), pipeline.get("gray"), pipeline.threshold(strategy)
+
+    def detect_layout_type(self, thresh, level=None):
         """
         Detect if schedule is grid-based or list-based.
+
+        Runs on a smaller pyramid level of thresh (see LAYOUT_PYRAMID_LEVEL)
+        with the kernels scaled to match; pass level=0 for full resolution.
         """
+        if level is None:
+            level = self.LAYOUT_PYRAMID_LEVEL
+        thresh = _downscale_binary(thresh, level)
+        kernel_length = max(1, 40 >> level)
 
-        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
+        horizontal_kernel = cv2.getStructuringElement(
+            cv2.MORPH_RECT, (kernel_length, 1)
+        )
         detect_horizontal = cv2.morphologyEx(
             thresh, cv2.MORPH_OPEN, horizontal_kernel, iterations=2
         )
@@ -50,7 +578,9 @@ class ScheduleParser:
             detect_horizontal, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
         )[0]
 
-        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
+        vertical_kernel = cv2.getStructuringElement(
+            cv2.MORPH_RECT, (1, kernel_length)
+        )
         detect_vertical = cv2.morphologyEx(
             thresh, cv2.MORPH_OPEN, vertical_kernel, iterations=2
         )
@@ -63,6 +593,133 @@ class ScheduleParser:
         else:
             return "list"
 
+    def find_table_cells(self, thresh, min_cell_size=12, level=None):
+        """
+        Find the cells of a ruled table from its horizontal and vertical lines.
+
+        Returns a list of table rows, each a list of cell boxes as
+        [x_min, x_max, y_min, y_max] (EasyOCR's horizontal_list format), or
+        None when the image doesn't look like a table.
+
+        Lines are found on a smaller pyramid level (see TABLE_PYRAMID_LEVEL)
+        and the cell boxes scaled back to full resolution.
+        """
+        if level is None:
+            level = self.TABLE_PYRAMID_LEVEL
+        scale = 1 << level
+        full_height, full_width = thresh.shape[:2]
+
+        # Lines are dark on the thresholded image, so open the inverted one
+        inverted = cv2.bitwise_not(_downscale_binary(thresh, level, keep_dark=True))
+        height, width = inverted.shape[:2]
+
+        horizontal_kernel = cv2.getStructuringElement(
+            cv2.MORPH_RECT, (max(40 // scale, width // 20), 1)
+        )
+        h_mask = cv2.morphologyEx(inverted, cv2.MORPH_OPEN, horizontal_kernel)
+        vertical_kernel = cv2.getStructuringElement(
+            cv2.MORPH_RECT, (1, max(40 // scale, height // 40))
+        )
+        v_mask = cv2.morphologyEx(inverted, cv2.MORPH_OPEN, vertical_kernel)
+
+        h_rects = [
+            cv2.boundingRect(c)
+            for c in cv2.findContours(
+                h_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
+            )[0]
+        ]
+        v_rects = [
+            cv2.boundingRect(c)
+            for c in cv2.findContours(
+                v_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
+            )[0]
+        ]
+        if len(h_rects) < 3 or len(v_rects) < 3:
+            return None
+
+        # Only keep lines that span most of the table, not stray underlines
+        longest_h = max(w for _, _, w, _ in h_rects)
+        longest_v = max(h for _, _, _, h in v_rects)
+        ys = sorted(
+            (y * 2 + h) * scale // 2 for _, y, w, h in h_rects if w >= longest_h / 2
+        )
+        xs = sorted(
+            (x * 2 + w) * scale // 2 for x, _, w, h in v_rects if h >= longest_v / 2
+        )
+
+        line_width = max(
+            [h for _, _, w, h in h_rects if w >= longest_h / 2]
+            + [w for _, _, w, h in v_rects if h >= longest_v / 2]
+        )
+        pad = line_width * scale + 2
+
+        cell_rows = []
+        for top, bottom in zip(ys, ys[1:]):
+            if bottom - top < min_cell_size + 2 * pad:
+                continue
+            row = []
+            for left, right in zip(xs, xs[1:]):
+                if right - left < min_cell_size + 2 * pad:
+                    continue
+                row.append(
+                    [
+                        left + pad,
+                        min(right - pad, full_width),
+                        top + pad,
+                        min(bottom - pad, full_height),
+                    ]
+                )
+            if row:
+                cell_rows.append(row)
+
+        if len(cell_rows) < 2 or max(len(row) for row in cell_rows) < 2:
+            return None
+
+        return cell_rows
+
+    def read_table_cells(self, pipeline, cell_rows, timer=NULL_TIMER):
+        """
+        Recognize text in table cells without running the text detector.
+
+        All cells go to the recognizer in one call. Returns (rows, ocr_results):
+        rows are RegionRows, one per table row, ready for
+        parse_rows_to_schedule, and ocr_results the raw recognizer output.
+        """
+        boxes = [cell for row in cell_rows for cell in row]
+        reader = self.reader
+
+        with timer.stage("recognize"):
+            ocr_results = reader.recognize(
+                pipeline.get("gray"),
+                boxes,
+                [],
+                detail=1,
+                reformat=False,
+                **self.recognize_options,
+            )
+
+        if self.adaptive:
+            ocr_results = self.retry_low_confidence(pipeline, ocr_results, timer)
+
+        # recognize() echoes each box's corners, use them to map text to cells
+        by_corner = {}
+        for bbox, text, conf in ocr_results:
+            by_corner[(int(bbox[0][0]), int(bbox[0][1]))] = (text, conf)
+
+        row_tables = []
+        for row in cell_rows:
+            cells = []
+            for x_min, x_max, y_min, y_max in row:
+                text, conf = by_corner.get((x_min, y_min), ("", 0.0))
+                if text.strip():
+                    cells.append(
+                        (x_min, y_min, x_max - x_min, y_max - y_min, conf, text)
+                    )
+            if cells:
+                row_tables.append(RegionTable(*zip(*cells)))
+
+        return RegionRows.from_tables(row_tables), ocr_results
+
     def detect_text_regions(self, thresh, min_width=20, min_height=10):
         """
         Find bounding boxes for all text regions in the image.
@@ -84,57 +741,26 @@ class ScheduleParser:
     def group_regions_into_rows(self, regions, y_tolerance=15):
         """
         Group text regions that are on the same horizontal line (row).
-        """
-
-        sorted_regions = sorted(regions, key=lambda r: r["y"])
-
-        rows = []
-        current_row = []
-        last_y = -1000
-
-        for region in sorted_regions:
-            if last_y == -1000 or abs(region["y"] - last_y) < y_tolerance:
-                current_row.append(region)
-                last_y = region["y"]
-            else:
-                if current_row:
-
-                    current_row.sort(key=lambda r: r["x"])
-                    rows.append(current_row)
-                current_row = [region]
-                last_y = region["y"]
 
-        if current_row:
-            current_row.sort(key=lambda r: r["x"])
-            rows.append(current_row)
+        regions is a RegionTable (or a list of region dicts). Returns the rows
+        as RegionRows, each row sorted left to right.
+        """
+        if not isinstance(regions, RegionTable):
+            regions = RegionTable.from_regions(regions)
 
-        return rows
+        return regions.group_rows(y_tolerance)
 
     def detect_columns(self, rows):
         """
         Detect column boundaries based on consistent x-positions across rows.
         """
+        if isinstance(rows, RegionRows):
+            return rows.table.column_positions()
 
-        x_positions = []
-        for row in rows:
-            for region in row:
-                x_positions.append(region["x"])
-
-        x_positions.sort()
-        columns = []
-        current_col = [x_positions[0]]
-
-        for x in x_positions[1:]:
-            if x - current_col[-1] < 50:
-                current_col.append(x)
-            else:
-                columns.append(int(np.mean(current_col)))
-                current_col = [x]
-
-        if current_col:
-            columns.append(int(np.mean(current_col)))
-
-        return columns
+        return RegionTable.concat(
+            row if isinstance(row, RegionTable) else RegionTable.from_regions(row)
+            for row in rows
+        ).column_positions()
 
     def ocr_region(self, img, region):
         """
@@ -150,122 +776,627 @@ class ScheduleParser:
 
         roi = img[y : y + h, x : x + w]
 
-        result = self.reader.readtext(roi, detail=0)
+        result = self.reader.readtext(roi, detail=0, **self.recognize_options)
         text = " ".join(result).strip()
 
         return text
 
-    def parse_schedule(self, image_path, debug=False):
+    def read_text(
+        self,
+        pipeline,
+        timer=NULL_TIMER,
+        detect_stage="detect_full",
+        recognize_stage="gray",
+    ):
         """
-        Main parsing function that handles different layout types.
+        Run EasyOCR detection + recognition on an already decoded image.
+
+        Same as reader.readtext, but reuses the pipeline's grayscale instead of
+        letting EasyOCR decode the file again. detect_stage and
+        recognize_stage pick the pipeline stages each model reads; boxes
+        found on a downscaled detector input are mapped back to full size.
         """
+        detect_image, scale = pipeline.get(detect_stage)
+        recognize_image = pipeline.get(recognize_stage)
+
+        spans = [(0, recognize_image.shape[0], 0, recognize_image.shape[0])]
+        if self.tiling:
+            spans = _tile_spans(
+                recognize_image.shape[0], self.TILE_HEIGHT, self.TILE_OVERLAP
+            )
 
-        img, gray, thresh = self.preprocess_image(image_path)
+        if len(spans) == 1:
+            ocr_results = self._read_strip(
+                detect_image, scale, recognize_image, spans[0], timer
+            )
+        else:
+            # Strips are read concurrently; per-stage timings from several
+            # threads would overlap, so they're timed as a whole
+            with timer.stage("tiles"):
+                with ThreadPoolExecutor(
+                    max_workers=min(self.tile_workers, len(spans)),
+                    thread_name_prefix="ocr-tile",
+                ) as pool:
+                    strips = pool.map(
+                        lambda span: self._read_strip(
+                            detect_image, scale, recognize_image, span
+                        ),
+                        spans,
+                    )
+                    ocr_results = [result for strip in strips for result in strip]
 
-        if debug:
-            cv2.imwrite("uploads/modified/debug_thresh.png", thresh)
+        if self.adaptive:
+            ocr_results = self.retry_low_confidence(pipeline, ocr_results, timer)
 
-        layout_type = self.detect_layout_type(thresh)
-        print(f"Detected layout type: {layout_type}")
+        return ocr_results
 
-        ocr_results = self.reader.readtext(image_path, detail=1)
+    def _read_strip(self, detect_image, scale, recognize_image, span, timer=NULL_TIMER):
+        """
+        Detect and recognize text in one horizontal strip of the image.
 
-        regions = []
-        for bbox, text, conf in ocr_results:
-            x = int(bbox[0][0])
-            y = int(bbox[0][1])
-            w = int(bbox[2][0] - bbox[0][0])
-            h = int(bbox[2][1] - bbox[0][1])
+        span is (top, bottom, own_top, own_bottom) in full-size rows, see
+        _tile_spans. Only boxes centered inside the strip's own rows are
+        kept, so text in the overlap with a neighbouring strip is read once.
+        Returns recognize() results in full-image coordinates.
+        """
+        reader = self.reader
+        top, bottom, own_top, own_bottom = span
+
+        with timer.stage("detect"):
+            strip = detect_image[int(top * scale) : int(np.ceil(bottom * scale))]
+            horizontal_list, free_list = reader.detect(strip, reformat=False)
+            horizontal_list, free_list = horizontal_list[0], free_list[0]
+
+            # Back to full-size coordinates relative to the strip's top
+            offset = int(top * scale) / scale - top
+            horizontal_list = [
+                [
+                    int(x_min / scale),
+                    int(x_max / scale),
+                    int(y_min / scale + offset),
+                    int(y_max / scale + offset),
+                ]
+                for x_min, x_max, y_min, y_max in horizontal_list
+                if own_top <= (y_min + y_max) / 2 / scale + offset + top < own_bottom
+            ]
+            free_list = [
+                [[int(x / scale), int(y / scale + offset)] for x, y in box]
+                for box in free_list
+                if own_top
+                <= sum(y for _, y in box) / len(box) / scale + offset + top
+                < own_bottom
+            ]
 
-            regions.append(
-                {"x": x, "y": y, "w": w, "h": h, "text": text, "confidence": conf}
+        if not horizontal_list and not free_list:
+            return []
+
+        with timer.stage("recognize"):
+            ocr_results = reader.recognize(
+                recognize_image[top:bottom],
+                horizontal_list,
+                free_list,
+                detail=1,
+                reformat=False,
+                **self.recognize_options,
             )
 
-        rows = self.group_regions_into_rows(regions)
+        if top == 0:
+            return ocr_results
+        return [
+            ([[x, y + top] for x, y in bbox], text, conf)
+            for bbox, text, conf in ocr_results
+        ]
 
-        if debug:
-            print(f"\nFound {len(rows)} rows:")
-            for i, row in enumerate(rows):
-                row_text = " | ".join([r["text"] for r in row])
-                print(f"Row {i}: {row_text}")
+    def retry_low_confidence(self, pipeline, ocr_results, timer=NULL_TIMER):
+        """
+        Read regions again whose confidence is below min_confidence, with
+        the expensive preprocessing (REGION_RETRY_STAGES) applied to just
+        those regions. A region keeps whichever reading is more confident.
+        """
+        results = list(ocr_results)
+        low = [
+            i for i, (_, _, conf) in enumerate(results) if conf < self.min_confidence
+        ]
+        if not low:
+            return results
+
+        gray = pipeline.get("gray")
+        height, width = gray.shape[:2]
+
+        with timer.stage("retry_regions"):
+            for stage in self.REGION_RETRY_STAGES:
+                _, process = PreprocessPipeline.STAGES[stage]
+
+                boxes = []
+                patched = gray.copy()
+                for i in low:
+                    x_min, x_max, y_min, y_max = _box_from_corners(results[i][0])
+                    x_min, x_max = max(0, x_min), min(width, x_max)
+                    y_min, y_max = max(0, y_min), min(height, y_max)
+                    if x_max <= x_min or y_max <= y_min:
+                        continue
+                    boxes.append((i, [x_min, x_max, y_min, y_max]))
+
+                    # Filter with some context around the box, then paste
+                    # back only the box itself
+                    pad = 8
+                    top, left = max(0, y_min - pad), max(0, x_min - pad)
+                    crop = process(gray[top : y_max + pad, left : x_max + pad])
+                    patched[y_min:y_max, x_min:x_max] = crop[
+                        y_min - top : y_max - top, x_min - left : x_max - left
+                    ]
+
+                if not boxes:
+                    break
 
-        schedule = self.parse_rows_to_schedule(rows)
+                retried = self.reader.recognize(
+                    patched,
+                    [box for _, box in boxes],
+                    [],
+                    detail=1,
+                    reformat=False,
+                    **self.recognize_options,
+                )
+                by_corner = {
+                    (int(bbox[0][0]), int(bbox[0][1])): (text, conf)
+                    for bbox, text, conf in retried
+                }
+
+                for i, (x_min, _, y_min, _) in boxes:
+                    text, conf = by_corner.get((x_min, y_min), ("", 0.0))
+                    if conf > results[i][2]:
+                        results[i] = (results[i][0], text, conf)
+
+                low = [i for i in low if results[i][2] < self.min_confidence]
+                if not low:
+                    break
 
-        return schedule
+        return results
 
-    def parse_rows_to_schedule(self, rows):
+    def read_text_batch(self, pipelines, timer=NULL_TIMER):
         """
-        Extract schedule data from grouped rows.
+        Run OCR over several images with batched inference.
+
+        Images of the same size go through the detector together as one batch.
+        All detected boxes are then recognized in a single recognize() call
+        against the grayscale images stacked into one canvas. Returns one
+        readtext-style result list per image, in image coordinates.
+        """
+        rgb_images = [pipeline.get("rgb") for pipeline in pipelines]
+        boxes = [None] * len(pipelines)
+
+        by_shape = {}
+        for i, rgb in enumerate(rgb_images):
+            by_shape.setdefault(rgb.shape, []).append(i)
+
+        reader = self.reader
+
+        with timer.stage("detect"):
+            for indexes in by_shape.values():
+                batch = np.stack([rgb_images[i] for i in indexes])
+                horizontal_lists, free_lists = reader.detect(batch, reformat=False)
+                for i, horizontal, free in zip(indexes, horizontal_lists, free_lists):
+                    boxes[i] = (horizontal, free)
+
+        grays = [pipeline.get("gray") for pipeline in pipelines]
+        offsets = []
+        y = 0
+        for gray in grays:
+            offsets.append(y)
+            y += gray.shape[0]
+
+        canvas = np.full(
+            (y, max(gray.shape[1] for gray in grays)), 255, dtype=np.uint8
+        )
+        all_horizontal, all_free = [], []
+
+        for gray, offset, (horizontal, free) in zip(grays, offsets, boxes):
+            height = gray.shape[0]
+            canvas[offset : offset + height, : gray.shape[1]] = gray
+
+            # Clip to this image so a margin never reaches into the next one
+            for x_min, x_max, y_min, y_max in horizontal:
+                all_horizontal.append(
+                    [x_min, x_max, max(0, y_min) + offset, min(height, y_max) + offset]
+                )
+            for points in free:
+                all_free.append(
+                    [[px, min(max(0, py), height) + offset] for px, py in points]
+                )
+
+        with timer.stage("recognize"):
+            results = reader.recognize(
+                canvas,
+                all_horizontal,
+                all_free,
+                detail=1,
+                reformat=False,
+                **self.recognize_options,
+            )
+
+        per_image = [[] for _ in pipelines]
+        for bbox, text, conf in results:
+            top = min(point[1] for point in bbox)
+            i = bisect.bisect_right(offsets, top) - 1
+            local_bbox = [[px, py - offsets[i]] for px, py in bbox]
+            per_image[i].append((local_bbox, text, conf))
+
+        return per_image
+
+    def regions_from_results(self, ocr_results, y_offset=0):
+        """
+        Convert readtext results into a RegionTable, optionally shifted down.
+        """
+        return RegionTable.from_results(ocr_results, y_offset)
+
+    def parse_schedules_batch(
+        self,
+        images,
+        debug=False,
+        strategy="sharpen",
+        timer=NULL_TIMER,
+        capture=NULL_CAPTURE,
+    ):
+        """
+        Parse a schedule spread over several screenshots (in order, top to
+        bottom) into one schedule.
+
+        Returns (schedule, timings) where timings has per-image preprocessing
+        times plus the batched detection/recognition and total times in ms.
+        capture and debug work as in parse_schedule.
+        """
+        if debug and not capture.enabled:
+            capture = ECHO_CAPTURE
+
+        batch = self._prepare_batch(images, strategy, timer, capture)
+        if "cached" not in batch:
+            ocr_start = time.perf_counter()
+            batch["results"] = self.read_text_batch(batch["pipelines"], timer)
+            batch["ocr_ms"] = round((time.perf_counter() - ocr_start) * 1000, 1)
+        return self._finish_batch(batch, timer, capture)
+
+    def parse_schedule_groups(
+        self, image_lists, strategy="sharpen", timer=NULL_TIMER, captures=None
+    ):
+        """
+        Parse several schedules at once, each a list of screenshots read as
+        by parse_schedules_batch, with a single read_text_batch over all of
+        their images. A lone screenshot is read as parse_schedule would
+        (alone, when that differs, see _reads_alone), so it parses the same
+        whether or not it shares the pass.
+
+        Returns one (schedule, timings) per schedule, or the exception that
+        schedule failed with. An error in the shared read is raised.
         """
-        days_order = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-        day_variations = {
-            "Monday": "Mon",
-            "Mon": "Mon",
-            "Tuesday": "Tue",
-            "Tue": "Tue",
-            "Tues": "Tue",
-            "Wednesday": "Wed",
-            "Wed": "Wed",
-            "Thursday": "Thu",
-            "Thu": "Thu",
-            "Thurs": "Thu",
-            "Friday": "Fri",
-            "Fri": "Fri",
-            "Saturday": "Sat",
-            "Sat": "Sat",
-            "Sunday": "Sun",
-            "Sun": "Sun",
+        captures = captures or [NULL_CAPTURE] * len(image_lists)
+        outcomes = [None] * len(image_lists)
+        batches = [None] * len(image_lists)
+
+        for i, (images, capture) in enumerate(zip(image_lists, captures)):
+            try:
+                if self._reads_alone(images):
+                    schedule = self.parse_schedule(
+                        images[0], strategy=strategy, timer=timer, capture=capture
+                    )
+                    outcomes[i] = (schedule, None)
+                else:
+                    batches[i] = self._prepare_batch(images, strategy, timer, capture)
+            except Exception as e:
+                outcomes[i] = e
+
+        reading = [i for i, b in enumerate(batches) if b and "cached" not in b]
+        pipelines = [p for i in reading for p in batches[i]["pipelines"]]
+        if pipelines:
+            ocr_start = time.perf_counter()
+            results = self.read_text_batch(pipelines, timer)
+            ocr_ms = round((time.perf_counter() - ocr_start) * 1000, 1)
+
+            for i in reading:
+                count = len(batches[i]["pipelines"])
+                batches[i]["results"], results = results[:count], results[count:]
+                batches[i]["ocr_ms"] = ocr_ms
+
+        for i, batch in enumerate(batches):
+            if batch is None:
+                continue
+            try:
+                outcomes[i] = self._finish_batch(batch, timer, captures[i])
+            except Exception as e:
+                outcomes[i] = e
+        return outcomes
+
+    def _cache_key(self, sources, strategy):
+        """
+        Cache key of a schedule read from sources (decoded or encoded
+        images) with the strategy preprocessing, which layout detection and
+        the grid fast path depend on. A single image has the same key
+        whichever path reads it.
+        """
+        key_bytes = [
+            source.tobytes() if isinstance(source, np.ndarray) else source
+            for source in sources
+        ]
+        if len(key_bytes) > 1:
+            digest = hashlib.sha256()
+            for image_bytes in key_bytes:
+                digest.update(hashlib.sha256(image_bytes).digest())
+            key_bytes = [digest.digest()]
+        return self.cache.key_for(key_bytes[0], f"{self.cache_version}-{strategy}")
+
+    def _reads_alone(self, images):
+        """
+        Whether a schedule of images has to be parsed by parse_schedule
+        rather than in a shared read_text_batch: for a single screenshot the
+        grid fast path, adaptive passes and tiling only exist there.
+        """
+        return len(images) == 1 and (
+            self.grid_fast_path or self.adaptive or self.tiling
+        )
+
+    def _prepare_batch(self, images, strategy, timer, capture):
+        """
+        Decode and threshold the screenshots of one schedule for
+        read_text_batch. On a cache hit the result holds the schedule under
+        "cached" instead of the pipelines.
+        """
+        start = time.perf_counter()
+        sources = [_read_source(image) for image in images]
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(sources, strategy)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                capture.log("OCR cache hit")
+                return {"start": start, "cached": cached["schedule"]}
+
+        pipelines = []
+        image_timings = []
+        for i, source in enumerate(sources):
+            pipeline = PreprocessPipeline(source)
+            with timer.stage("preprocess"):
+                thresh = pipeline.threshold(strategy)
+            with timer.stage("layout"):
+                layout_type = self.detect_layout_type(thresh)
+            pipelines.append(pipeline)
+            capture.image(f"thresh_{i}", thresh)
+            capture.log(f"Image {i}: {layout_type} layout")
+
+            image_timings.append(
+                {
+                    "index": i,
+                    "layout": layout_type,
+                    "preprocess_ms": round(sum(pipeline.timings.values()) * 1000, 1),
+                }
+            )
+
+        return {
+            "start": start,
+            "cache_key": cache_key,
+            "pipelines": pipelines,
+            "image_timings": image_timings,
         }
 
-        schedule = {}
-        last_day_found = None
-        last_date_seen = None
-        last_time_saved = None
-        pending_times = None  # NEW: Store times that don't belong to last day
+    def _finish_batch(self, batch, timer, capture):
+        """
+        (schedule, timings) of a _prepare_batch result whose images have been
+        read into batch["results"].
+        """
+        if "cached" in batch:
+            total_ms = round((time.perf_counter() - batch["start"]) * 1000, 1)
+            return batch["cached"], {"images": [], "total_ms": total_ms}
+
+        pipelines = batch["pipelines"]
+        per_image_results = batch["results"]
+        image_timings = batch["image_timings"]
+
+        for i, ocr_results in enumerate(per_image_results):
+            capture.regions(f"image_{i}", ocr_results, image=f"thresh_{i}")
+
+        # Stack the screenshots' regions top to bottom so rows keep their order
+        with timer.stage("group_rows"):
+            tables = []
+            y_offset = 0
+            for pipeline, ocr_results, timing in zip(
+                pipelines, per_image_results, image_timings
+            ):
+                tables.append(self.regions_from_results(ocr_results, y_offset))
+                y_offset += pipeline.get("gray").shape[0]
+                timing["regions"] = len(ocr_results)
 
-        for idx, row in enumerate(rows):
-            row_text = " ".join([r["text"] for r in row])
+            rows = self.group_regions_into_rows(RegionTable.concat(tables))
 
-            # PRE-PROCESS: Fix common OCR mistakes
-            row_text = re.sub(r"\b[Ii]am\b", "1am", row_text, flags=re.IGNORECASE)
-            row_text = re.sub(r"\b[Ii]pm\b", "1pm", row_text, flags=re.IGNORECASE)
-            row_text = re.sub(r"\blam\b", "1am", row_text, flags=re.IGNORECASE)
-            row_text = re.sub(r"\blpm\b", "1pm", row_text, flags=re.IGNORECASE)
+        if capture.enabled:
+            capture.log(f"\nFound {len(rows)} rows across {len(pipelines)} images:")
+            for i, row_text in enumerate(rows.texts(" | ")):
+                capture.log(f"Row {i}: {row_text}")
 
-            print(f"DEBUG Row {idx}: '{row_text}'")
+        with timer.stage("parse_rows"):
+            schedule = self.parse_rows_to_schedule(rows, capture=capture)
 
-            # Look for day name
-            day_found = None
-            for day_variant, day_canonical in day_variations.items():
-                if re.search(rf"\b{day_variant}\b", row_text, re.IGNORECASE):
-                    day_found = day_canonical
-                    break
+        if batch["cache_key"] is not None:
+            self.cache.put(
+                batch["cache_key"],
+                {"regions": per_image_results, "schedule": schedule},
+            )
+
+        timings = {
+            "images": image_timings,
+            "ocr_ms": batch["ocr_ms"],
+            "total_ms": round((time.perf_counter() - batch["start"]) * 1000, 1),
+        }
+        return schedule, timings
+
+    def parse_schedule_bytes(
+        self,
+        image_bytes,
+        debug=False,
+        strategy="sharpen",
+        timer=NULL_TIMER,
+        capture=NULL_CAPTURE,
+    ):
+        """
+        Parse an uploaded image straight from memory, without touching disk.
+        """
+        return self.parse_schedule(
+            image_bytes, debug=debug, strategy=strategy, timer=timer, capture=capture
+        )
+
+    def parse_schedule(
+        self,
+        image,
+        debug=False,
+        strategy="sharpen",
+        timer=NULL_TIMER,
+        capture=NULL_CAPTURE,
+    ):
+        """
+        Main parsing function that handles different layout types.
+
+        image can be a file path, the encoded image bytes or a BGR ndarray.
+        It is decoded once and shared by every step below.
+
+        Pass a StageTimer (see ocr_metrics.py) as timer to get a per-stage
+        timing breakdown in timer.timings, and a CaptureSession (see
+        debug_capture.py) as capture to keep the threshold image, recognized
+        regions and row dump. debug=True prints the same log to stdout.
+        """
+        if debug and not capture.enabled:
+            capture = ECHO_CAPTURE
+
+        with timer.stage("read"):
+            source = _read_source(image)
+
+        cache_key = None
+        if self.cache is not None:
+            with timer.stage("cache"):
+                cache_key = self._cache_key([source], strategy)
+                cached = self.cache.get(cache_key)
+
+            if cached is not None:
+                capture.log("OCR cache hit")
+                return cached["schedule"]
+
+        pipeline = PreprocessPipeline(source)
+
+        with timer.stage("decode"):
+            pipeline.get("img")
 
-            # Look for date number
-            date_match = re.search(r"\b(\d{1,2})\b", row_text)
-            date_num = (
-                int(date_match.group(1))
-                if date_match and 1 <= int(date_match.group(1)) <= 31
-                else None
+        with timer.stage("preprocess"):
+            thresh = pipeline.threshold(strategy)
+
+        if capture.enabled:
+            capture.image("thresh", thresh)
+            stage_times = ", ".join(
+                f"{name} {secs * 1000:.0f}ms" for name, secs in pipeline.timings.items()
             )
+            capture.log(f"Preprocessing ({strategy}): {stage_times}")
+
+        with timer.stage("layout"):
+            layout_type = self.detect_layout_type(thresh)
+        capture.log(f"Detected layout type: {layout_type}")
+
+        cell_rows = None
+        if self.grid_fast_path:
+            with timer.stage("cells"):
+                cell_rows = self.find_table_cells(thresh)
+
+        # Each pass reads the whole image, they're tried in order until one
+        # accounts for every day or reads everything confidently. Without
+        # adaptive OCR there's only ever one.
+        passes = []
+        if cell_rows:
+            capture.log(f"Grid fast path: {sum(len(row) for row in cell_rows)} cells")
+            passes.append(None)
+        if self.adaptive:
+            passes.extend(self.ADAPTIVE_PASSES)
+        elif not cell_rows:
+            passes.append(("detect_full", "gray"))
+
+        best = None
+        for ocr_pass in passes:
+            if ocr_pass is None:
+                rows, ocr_results = self.read_table_cells(pipeline, cell_rows, timer)
+            else:
+                ocr_results = self.read_text(pipeline, timer, *ocr_pass)
 
-            # Check for time patterns
-            time_patterns = [
-                r"(\d{1,2})\s*(?:a\.?m\.?|p\.?m\.?)\s*[-–—:]\s*(\d{1,2})\s*(a\.?m\.?|p\.?m\.?)",
-                r"(\d{1,2})\s*(a\.?m\.?|p\.?m\.?)\s+(\d{1,2})\s*(a\.?m\.?|p\.?m\.?)",
-            ]
+                with timer.stage("group_rows"):
+                    regions = self.regions_from_results(ocr_results)
+                    rows = self.group_regions_into_rows(regions)
+
+            capture.regions(
+                ocr_pass[0] if ocr_pass else "cells", ocr_results, image="thresh"
+            )
+            if capture.enabled:
+                capture.log(f"\nFound {len(rows)} rows:")
+                for i, row_text in enumerate(rows.texts(" | ")):
+                    capture.log(f"Row {i}: {row_text}")
+
+            with timer.stage("parse_rows"):
+                found = self.parse_rows_to_schedule(
+                    rows, fill_missing=False, capture=capture
+                )
+                unread = self.unread_days(rows, found)
+
+            if best is None or len(unread) < len(best[0]):
+                best = (unread, found, ocr_results)
+            if not unread:
+                break
+
+            doubtful = sum(
+                1 for _, _, conf in ocr_results if conf < self.min_confidence
+            )
+            if not doubtful:
+                # Everything was read confidently, so the missing days are
+                # left blank in the screenshot (days off), not misread
+                break
+            capture.log(
+                f"No shift or day off for {', '.join(unread)} and {doubtful} "
+                f"regions below {self.min_confidence} confidence"
+            )
 
-            time_match = None
-            pattern_used = None
+        _, found, ocr_results = best
+        schedule = self._fill_missing_days(found)
 
-            for pattern in time_patterns:
-                time_match = re.search(pattern, row_text, re.IGNORECASE)
-                if time_match:
-                    pattern_used = pattern
-                    break
+        if cache_key is not None:
+            with timer.stage("cache"):
+                self.cache.put(
+                    cache_key, {"regions": ocr_results, "schedule": schedule}
+                )
 
-            print(
-                f"  Day: {day_found}, Date: {date_num}, Time: {bool(time_match)}, LastDay: {last_day_found}, LastDate: {last_date_seen}"
+        if self.cold_start_seconds is None:
+            self.cold_start_seconds = time.perf_counter() - self._created_at
+            print(f"Cold start to first OCR: {self.cold_start_seconds:.1f}s")
+
+        return schedule
+
+    def parse_rows_to_schedule(self, rows, fill_missing=True, capture=NULL_CAPTURE):
+        """
+        Extract schedule data from grouped rows.
+
+        Days nothing was found for are filled in as "Not Scheduled", unless
+        fill_missing is False. Each decision is logged to capture.
+        """
+        log = capture.log
+        schedule = {}
+        last_day_found = None
+        last_date_seen = None
+        last_time_saved = None
+        pending_times = None  # NEW: Store times that don't belong to last day
+
+        if isinstance(rows, RegionRows):
+            row_texts = rows.texts()
+        else:
+            row_texts = (" ".join([r["text"] for r in row]) for row in rows)
+
+        for idx, row_text in enumerate(row_texts):
+            tokens = tokenize_row(row_text)
+            day_found = tokens.day
+            date_num = tokens.date
+
+            log(f"DEBUG Row {idx}: '{tokens.text}'")
+            log(
+                f"  Day: {day_found}, Date: {date_num}, Time: {tokens.time_range is not None}, LastDay: {last_day_found}, LastDate: {last_date_seen}"
             )
 
             # NEW: Check for inferred day with pending times
@@ -276,23 +1407,23 @@ class ScheduleParser:
                 and not day_found
             ):
                 if last_day_found:
-                    last_day_idx = days_order.index(last_day_found)
-                    inferred_day = days_order[(last_day_idx + 1) % 7]
+                    last_day_idx = DAYS_ORDER.index(last_day_found)
+                    inferred_day = DAYS_ORDER[(last_day_idx + 1) % 7]
 
-                    print(
+                    log(
                         f"  🎯 INFERRED: Date {date_num} = {inferred_day} (after {last_day_found} date {last_date_seen})"
                     )
 
                     # Use pending times if available, otherwise use last saved times
                     if pending_times and inferred_day not in schedule:
                         schedule[inferred_day] = pending_times
-                        print(
+                        log(
                             f"  ✅ Assigned {inferred_day}: {schedule[inferred_day]} (from pending)"
                         )
                         pending_times = None  # Clear pending
                     elif last_time_saved and inferred_day not in schedule:
                         schedule[inferred_day] = last_time_saved
-                        print(
+                        log(
                             f"  ✅ Assigned {inferred_day}: {schedule[inferred_day]} (from last saved)"
                         )
 
@@ -300,176 +1431,365 @@ class ScheduleParser:
                 last_day_found = day_found
                 if date_num:
                     last_date_seen = date_num
-                    print(f"  📅 Mapped date {date_num} → {day_found}")
+                    log(f"  📅 Mapped date {date_num} → {day_found}")
 
-                if re.search(r"Not\s+Scheduled", row_text, re.IGNORECASE):
-                    print(
+                if tokens.not_scheduled:
+                    log(
                         f"  → Found 'Not Scheduled' for {day_found}, waiting for next row..."
                     )
                     schedule[day_found] = "Not Scheduled"  # Save it as Not Scheduled
                     continue
-                elif time_match:
-                    # Process time normally
-                    start_hour = time_match.group(1)
-
-                    if pattern_used == time_patterns[0]:
-                        end_hour = time_match.group(2)
-                        end_period_raw = time_match.group(3)
-                    else:
-                        end_hour = time_match.group(3)
-                        end_period_raw = time_match.group(4)
-
-                    end_period = end_period_raw.replace(".", "").strip().lower()
-
-                    matched_text = time_match.group(0).lower()
-                    first_time_part = (
-                        matched_text.split()[0]
-                        if " " in matched_text
-                        else matched_text[: len(start_hour) + 3]
-                    )
-
-                    start_period = (
-                        "pm"
-                        if ("pm" in first_time_part or "p.m" in first_time_part)
-                        else "am"
-                    )
-
-                    # OCR CORRECTION
-                    start_int = int(start_hour)
-                    end_int = int(end_hour)
-
-                    if (
-                        end_int == 1
-                        and end_period == "am"
-                        and start_int >= 2
-                        and start_period == "am"
-                    ):
-                        print(
-                            f"  ⚠️  OCR Correction for {day_found}: {end_hour}am → 11am"
+                elif tokens.time_range:
+                    if tokens.corrected_from:
+                        log(
+                            f"  ⚠️  OCR Correction for {day_found}: {tokens.corrected_from}am → 11am"
                         )
-                        end_hour = "11"
 
-                    time_str = f"{start_hour}{start_period} - {end_hour}{end_period}"
-                    schedule[day_found] = time_str
-                    last_time_saved = time_str
+                    schedule[day_found] = tokens.time_range
+                    last_time_saved = tokens.time_range
                     pending_times = None  # Clear pending since we used it
-                    print(f"  → Saved {day_found}: {schedule[day_found]}")
+                    log(f"  → Saved {day_found}: {schedule[day_found]}")
 
-            elif time_match and last_day_found:
+            elif tokens.time_range and last_day_found:
                 # Check if last day was "Not Scheduled" - if so, these times are for the NEXT day
                 if (
                     last_day_found in schedule
                     and schedule[last_day_found] == "Not Scheduled"
                 ):
-                    print(
+                    log(
                         f"  💾 Found orphaned time after 'Not Scheduled', storing for next day..."
                     )
+                    if tokens.corrected_from:
+                        log(
+                            f"  ⚠️  OCR Correction: {tokens.corrected_from}am → 11am"
+                        )
 
-                    # Parse and store the times
-                    start_hour = time_match.group(1)
-
-                    if pattern_used == time_patterns[0]:
-                        end_hour = time_match.group(2)
-                        end_period_raw = time_match.group(3)
-                    else:
-                        end_hour = time_match.group(3)
-                        end_period_raw = time_match.group(4)
-
-                    end_period = end_period_raw.replace(".", "").strip().lower()
-                    matched_text = time_match.group(0).lower()
-                    first_time_part = (
-                        matched_text.split()[0]
-                        if " " in matched_text
-                        else matched_text[: len(start_hour) + 3]
-                    )
-                    start_period = (
-                        "pm"
-                        if ("pm" in first_time_part or "p.m" in first_time_part)
-                        else "am"
-                    )
-
-                    # OCR CORRECTION
-                    start_int = int(start_hour)
-                    end_int = int(end_hour)
-                    if (
-                        end_int == 1
-                        and end_period == "am"
-                        and start_int >= 2
-                        and start_period == "am"
-                    ):
-                        print(f"  ⚠️  OCR Correction: {end_hour}am → 11am")
-                        end_hour = "11"
-
-                    pending_times = (
-                        f"{start_hour}{start_period} - {end_hour}{end_period}"
-                    )
-                    print(f"  → Pending times: {pending_times}")
+                    pending_times = tokens.time_range
+                    log(f"  → Pending times: {pending_times}")
                 else:
                     # Normal orphaned time - assign to last day
-                    print(f"  📍 Found orphaned time, assigning to {last_day_found}")
-
-                    start_hour = time_match.group(1)
-
-                    if pattern_used == time_patterns[0]:
-                        end_hour = time_match.group(2)
-                        end_period_raw = time_match.group(3)
-                    else:
-                        end_hour = time_match.group(3)
-                        end_period_raw = time_match.group(4)
-
-                    end_period = end_period_raw.replace(".", "").strip().lower()
-                    matched_text = time_match.group(0).lower()
-                    first_time_part = (
-                        matched_text.split()[0]
-                        if " " in matched_text
-                        else matched_text[: len(start_hour) + 3]
-                    )
-                    start_period = (
-                        "pm"
-                        if ("pm" in first_time_part or "p.m" in first_time_part)
-                        else "am"
-                    )
-
-                    # OCR CORRECTION
-                    start_int = int(start_hour)
-                    end_int = int(end_hour)
-                    if (
-                        end_int == 1
-                        and end_period == "am"
-                        and start_int >= 2
-                        and start_period == "am"
-                    ):
-                        print(
-                            f"  ⚠️  OCR Correction for {last_day_found}: {end_hour}am → 11am"
+                    log(f"  📍 Found orphaned time, assigning to {last_day_found}")
+                    if tokens.corrected_from:
+                        log(
+                            f"  ⚠️  OCR Correction for {last_day_found}: {tokens.corrected_from}am → 11am"
                         )
-                        end_hour = "11"
 
-                    time_str = f"{start_hour}{start_period} - {end_hour}{end_period}"
-                    schedule[last_day_found] = time_str
-                    last_time_saved = time_str
-                    print(f"  → Saved {last_day_found}: {schedule[last_day_found]}")
+                    schedule[last_day_found] = tokens.time_range
+                    last_time_saved = tokens.time_range
+                    log(f"  → Saved {last_day_found}: {schedule[last_day_found]}")
 
-        # Fill in missing days
-        for day in days_order:
+        if fill_missing:
+            schedule = self._fill_missing_days(schedule)
+
+        return schedule
+
+    def unread_days(self, rows, schedule):
+        """
+        Days the rows say nothing about: no shift was parsed for them and no
+        "Not Scheduled" follows their day name. Those are the days OCR most
+        likely misread, rather than days off.
+        """
+        if isinstance(rows, RegionRows):
+            row_texts = rows.texts()
+        else:
+            row_texts = (" ".join([r["text"] for r in row]) for row in rows)
+
+        accounted = set(schedule)
+        last_day = None
+        for row_text in row_texts:
+            tokens = tokenize_row(row_text)
+            if tokens.day:
+                last_day = tokens.day
+            if tokens.not_scheduled and last_day:
+                accounted.add(last_day)
+
+        return [day for day in DAYS_ORDER if day not in accounted]
+
+    def _fill_missing_days(self, schedule):
+        for day in DAYS_ORDER:
             if day not in schedule:
                 schedule[day] = "Not Scheduled"
 
         return schedule
 
 
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp")
+
+# The parser owned by each batch worker process, see _init_batch_worker
+_batch_parser = None
+_batch_load_error = None
+
+
+def find_images(patterns):
+    """
+    Image paths for a mix of files, directories (searched recursively) and
+    glob patterns, in a stable order and without duplicates.
+    """
+    import glob
+    import os
+
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for dirpath, dirnames, filenames in os.walk(pattern):
+                dirnames.sort()
+                paths.extend(
+                    os.path.join(dirpath, name)
+                    for name in sorted(filenames)
+                    if name.lower().endswith(IMAGE_EXTENSIONS)
+                )
+        elif glob.has_magic(pattern):
+            paths.extend(
+                path
+                for path in sorted(glob.glob(pattern, recursive=True))
+                if os.path.isfile(path) and path.lower().endswith(IMAGE_EXTENSIONS)
+            )
+        else:
+            paths.append(pattern)
+
+    return list(dict.fromkeys(os.path.normpath(path) for path in paths))
+
+
+def read_finished(output_path, retry_failed=False):
+    """
+    Paths already in a JSONL output file from an earlier (possibly
+    interrupted) run, so they can be skipped. A half-written last line is cut
+    off. Failed images count as finished unless retry_failed is set.
+    """
+    import json
+    import os
+
+    if not os.path.exists(output_path):
+        return set()
+
+    with open(output_path, "rb+") as f:
+        content = f.read()
+        if content and not content.endswith(b"\n"):
+            # The run was killed mid-write, drop the partial record
+            f.truncate(content.rfind(b"\n") + 1)
+            content = content[: content.rfind(b"\n") + 1]
+
+    finished = set()
+    for line in content.decode("utf-8").splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if record.get("error") and retry_failed:
+            continue
+        finished.add(record["path"])
+    return finished
+
+
+def _init_batch_worker(options):
+    global _batch_parser, _batch_load_error
+    _batch_parser = ScheduleParser(**options)
+    # Load the model up front so the first image's timing doesn't include it.
+    # A pool whose initializer raises keeps restarting workers forever, so a
+    # failure is kept and reported for each image instead.
+    try:
+        _batch_parser.load_reader()
+    except Exception as e:
+        _batch_load_error = e
+
+
+def _parse_batch_image(path, verbose=False):
+    """
+    Parse one image in a batch worker. Never raises: failures are returned
+    in the record so one bad screenshot doesn't stop the batch.
+    """
+    from ocr_metrics import StageTimer
+
+    timer = StageTimer()
+    record = {"path": path}
+    start = time.perf_counter()
+    try:
+        if _batch_load_error is not None:
+            raise _batch_load_error
+        record["schedule"] = _batch_parser.parse_schedule(
+            path, debug=verbose, timer=timer
+        )
+        record["error"] = None
+    except Exception as e:
+        record["schedule"] = None
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["ms"] = round((time.perf_counter() - start) * 1000, 1)
+    record["stages_ms"] = timer.as_ms()
+    return record
+
+
+def parse_batch(
+    paths,
+    output_path,
+    workers=1,
+    parser_options=None,
+    retry_failed=False,
+    verbose=False,
+):
+    """
+    Parse many images across a pool of worker processes, each holding one
+    ScheduleParser for its whole life.
+
+    Every result is appended to output_path as one JSON line as soon as it
+    finishes: {"path", "schedule", "error", "ms", "stages_ms"}. Images that
+    already have a line there are skipped, so an interrupted run picks up
+    where it stopped.
+
+    Returns (parsed, failed) counts for this run.
+    """
+    import json
+    import multiprocessing
+    import statistics
+    import sys
+
+    finished = read_finished(output_path, retry_failed=retry_failed)
+    todo = [path for path in paths if path not in finished]
+    skipped = len(paths) - len(todo)
+    print(
+        f"{len(paths)} images, {skipped} already in {output_path}, "
+        f"{len(todo)} to parse with {workers} workers",
+        file=sys.stderr,
+    )
+    if not todo:
+        return 0, 0
+
+    # spawn rather than fork, so no worker inherits torch or OpenCV thread
+    # pools from the parent
+    context = multiprocessing.get_context("spawn")
+    latencies = []
+    failed = 0
+    start = time.perf_counter()
+
+    with open(output_path, "a", encoding="utf-8") as output, context.Pool(
+        workers, initializer=_init_batch_worker, initargs=(parser_options or {},)
+    ) as pool:
+        results = pool.imap_unordered(
+            functools.partial(_parse_batch_image, verbose=verbose), todo
+        )
+        for done, record in enumerate(results, start=1):
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+
+            if record["error"]:
+                failed += 1
+                outcome = f"FAILED {record['error']}"
+            else:
+                latencies.append(record["ms"])
+                outcome = f"{record['ms']:.0f} ms"
+
+            elapsed = time.perf_counter() - start
+            remaining = elapsed / done * (len(todo) - done)
+            print(
+                f"[{done}/{len(todo)}] {record['path']}: {outcome} "
+                f"({done / elapsed:.2f}/s, ~{remaining:.0f}s left)",
+                file=sys.stderr,
+            )
+
+    elapsed = time.perf_counter() - start
+    summary = f"Parsed {len(latencies)} images, {failed} failed in {elapsed:.1f}s"
+    if latencies:
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        summary += (
+            f" ({len(todo) / elapsed:.2f} images/s, "
+            f"median {statistics.median(latencies):.0f} ms, p95 {p95:.0f} ms)"
+        )
+    print(summary, file=sys.stderr)
+
+    return len(latencies), failed
+
+
 def main():
-    parser = ScheduleParser()
-
-    IMAGE_PATH = "test2.png"
-    schedule = parser.parse_schedule(IMAGE_PATH, debug=True)
-
-    print("\n" + "=" * 50)
-    print("PARSED SCHEDULE")
-    print("=" * 50)
-    days_order = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-    for day in days_order:
-        print(f"{day}: {schedule.get(day, 'Not Scheduled')}")
-    print("=" * 50)
+    import argparse
+    import os
+    import sys
+
+    arg_parser = argparse.ArgumentParser(
+        description="Parse schedule screenshots. With --output, runs as a "
+        "parallel batch and writes one JSON line per image."
+    )
+    arg_parser.add_argument(
+        "images", nargs="*", default=["test2.png"], help="files, directories or globs"
+    )
+    arg_parser.add_argument("--output", "-o", help="JSONL file to append results to")
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="worker processes, each with its own model (default: one per core)",
+    )
+    arg_parser.add_argument(
+        "--threads",
+        type=int,
+        help="torch/OpenCV threads per worker (default: cores / workers)",
+    )
+    arg_parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="parse images that failed in an earlier run again",
+    )
+    arg_parser.add_argument(
+        "--quantize", action=argparse.BooleanOptionalAction, default=True
+    )
+    # Off like OCR_GRID_FAST_PATH, OCR_ADAPTIVE and OCR_VOCABULARY until
+    # measured on real screenshots, a backfill shouldn't trade accuracy for
+    # speed
+    arg_parser.add_argument(
+        "--grid", action=argparse.BooleanOptionalAction, default=False
+    )
+    arg_parser.add_argument(
+        "--adaptive", action=argparse.BooleanOptionalAction, default=False
+    )
+    arg_parser.add_argument(
+        "--vocabulary", action=argparse.BooleanOptionalAction, default=False
+    )
+    arg_parser.add_argument(
+        "--verbose", action="store_true", help="print the parser's log"
+    )
+    args = arg_parser.parse_args()
+
+    paths = find_images(args.images)
+    if not paths:
+        sys.exit("No images found")
+
+    if args.output:
+        workers = max(1, min(args.workers, len(paths)))
+        threads = args.threads or max(1, (os.cpu_count() or 1) // workers)
+        _, failed = parse_batch(
+            paths,
+            args.output,
+            workers=workers,
+            parser_options={
+                "grid_fast_path": args.grid,
+                "quantize": args.quantize,
+                "adaptive": args.adaptive,
+                "vocabulary": args.vocabulary,
+                # The pool already keeps every core busy, strips go one by one
+                "tiling": True,
+                "threads": threads,
+                "interop_threads": 1,
+            },
+            retry_failed=args.retry_failed,
+            verbose=args.verbose,
+        )
+        sys.exit(1 if failed else 0)
+
+    parser = ScheduleParser(
+        grid_fast_path=args.grid,
+        quantize=args.quantize,
+        adaptive=args.adaptive,
+        vocabulary=args.vocabulary,
+        tiling=True,
+    )
+    for path in paths:
+        schedule = parser.parse_schedule(path, debug=True)
+
+        print("\n" + "=" * 50)
+        print(f"PARSED SCHEDULE: {path}")
+        print("=" * 50)
+        for day in DAYS_ORDER:
+            print(f"{day}: {schedule.get(day, 'Not Scheduled')}")
+        print("=" * 50)
 
 
 if __name__ == "__main__":
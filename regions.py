@@ -0,0 +1,190 @@
+import numpy as np
+
+
+class RegionTable:
+    """
+    OCR text regions stored column-wise: NumPy arrays for x, y, w, h and
+    confidence, with the recognized strings kept in a plain list alongside.
+
+    Sorting and grouping work on the arrays in one go instead of looping
+    over a dict per region, so dense screenshots don't pay per-region
+    Python overhead.
+    """
+
+    def __init__(self, x, y, w, h, confidence, text):
+        self.x = np.asarray(x, dtype=np.int32)
+        self.y = np.asarray(y, dtype=np.int32)
+        self.w = np.asarray(w, dtype=np.int32)
+        self.h = np.asarray(h, dtype=np.int32)
+        self.confidence = np.asarray(confidence, dtype=np.float32)
+        self.text = list(text)
+
+    @classmethod
+    def empty(cls):
+        return cls([], [], [], [], [], [])
+
+    @classmethod
+    def from_results(cls, ocr_results, y_offset=0):
+        """
+        Build from readtext/recognize results: (bbox, text, confidence) with
+        bbox as four corner points, optionally shifted down by y_offset.
+        """
+        if not ocr_results:
+            return cls.empty()
+
+        corners = np.array([bbox for bbox, _, _ in ocr_results], dtype=np.float64)
+        top_left = corners[:, 0].astype(np.int32)
+        bottom_right = corners[:, 2]
+
+        return cls(
+            top_left[:, 0],
+            top_left[:, 1] + y_offset,
+            (bottom_right[:, 0] - corners[:, 0, 0]).astype(np.int32),
+            (bottom_right[:, 1] - corners[:, 0, 1]).astype(np.int32),
+            [conf for _, _, conf in ocr_results],
+            [text for _, text, _ in ocr_results],
+        )
+
+    @classmethod
+    def from_regions(cls, regions):
+        """
+        Build from a list of region dicts ({"x", "y", "w", "h", "text", ...}).
+        """
+        return cls(
+            [r["x"] for r in regions],
+            [r["y"] for r in regions],
+            [r["w"] for r in regions],
+            [r["h"] for r in regions],
+            [r.get("confidence", 0.0) for r in regions],
+            [r.get("text", "") for r in regions],
+        )
+
+    @classmethod
+    def concat(cls, tables):
+        tables = list(tables)
+        if not tables:
+            return cls.empty()
+
+        return cls(
+            np.concatenate([t.x for t in tables]),
+            np.concatenate([t.y for t in tables]),
+            np.concatenate([t.w for t in tables]),
+            np.concatenate([t.h for t in tables]),
+            np.concatenate([t.confidence for t in tables]),
+            [text for t in tables for text in t.text],
+        )
+
+    def __len__(self):
+        return len(self.text)
+
+    def __getitem__(self, i):
+        return {
+            "x": int(self.x[i]),
+            "y": int(self.y[i]),
+            "w": int(self.w[i]),
+            "h": int(self.h[i]),
+            "text": self.text[i],
+            "confidence": float(self.confidence[i]),
+        }
+
+    def __iter__(self):
+        """
+        Yield each region as a dict, for code that still expects those.
+        """
+        for i in range(len(self)):
+            yield self[i]
+
+    def take(self, indices):
+        indices = np.asarray(indices, dtype=np.intp)
+        return RegionTable(
+            self.x[indices],
+            self.y[indices],
+            self.w[indices],
+            self.h[indices],
+            self.confidence[indices],
+            [self.text[i] for i in indices],
+        )
+
+    def group_rows(self, y_tolerance=15):
+        """
+        Group regions on the same horizontal line into rows.
+
+        Regions are sorted by y, and a new row starts wherever y jumps by at
+        least y_tolerance from the region before it. Each row is then sorted
+        by x. Both sorts are stable, so ties keep their input order.
+        """
+        if not len(self):
+            return RegionRows(self, np.zeros(0, dtype=np.intp))
+
+        by_y = np.argsort(self.y, kind="stable")
+        y_sorted = self.y[by_y]
+        breaks = np.abs(np.diff(y_sorted)) >= y_tolerance
+        row_labels = np.concatenate(([0], np.cumsum(breaks)))
+
+        # lexsort sorts by the last key first: row, then x within the row
+        order = by_y[np.lexsort((self.x[by_y], row_labels))]
+        starts = np.flatnonzero(np.concatenate(([True], breaks)))
+
+        return RegionRows(self.take(order), starts)
+
+    def column_positions(self, gap=50):
+        """
+        Cluster x positions into columns. A new column starts wherever the
+        sorted x positions jump by gap or more; returns each column's mean x.
+        """
+        if not len(self):
+            return []
+
+        xs = np.sort(self.x).astype(np.float64)
+        starts = np.flatnonzero(np.concatenate(([True], np.diff(xs) >= gap)))
+        counts = np.diff(np.append(starts, len(xs)))
+        means = np.add.reduceat(xs, starts) / counts
+
+        return [int(mean) for mean in means]
+
+
+class RegionRows:
+    """
+    Regions grouped into rows: one RegionTable sorted row by row, plus the
+    index where each row starts. Indexing or iterating gives each row as its
+    own RegionTable.
+    """
+
+    def __init__(self, table, starts):
+        self.table = table
+        self.starts = np.asarray(starts, dtype=np.intp)
+
+    @classmethod
+    def from_tables(cls, rows):
+        rows = [row for row in rows if len(row)]
+        lengths = [len(row) for row in rows]
+        starts = np.cumsum([0] + lengths[:-1]) if rows else []
+        return cls(RegionTable.concat(rows), starts)
+
+    def _bounds(self, i):
+        end = self.starts[i + 1] if i + 1 < len(self.starts) else len(self.table)
+        return self.starts[i], end
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("row index out of range")
+        start, end = self._bounds(i)
+        return self.table.take(np.arange(start, end))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def texts(self, separator=" "):
+        """
+        Each row's text joined left to right, without building row tables.
+        """
+        text = self.table.text
+        for i in range(len(self)):
+            start, end = self._bounds(i)
+            yield separator.join(text[start:end])
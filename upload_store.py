@@ -0,0 +1,256 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+from sqlalchemy.exc import IntegrityError
+
+from models import db, OCRJob, Schedule, StoredUpload
+
+KEY_PATTERN = re.compile(r"^[0-9a-f]{40}\.[a-z0-9]{1,5}$")
+
+# Only these are ever removed from the old flat uploads folder
+LEGACY_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif")
+
+
+def keys_from(image_filename):
+    """
+    Store keys in a Schedule/OCRJob image_filename (comma separated).
+    Older rows hold plain upload names, which are skipped.
+    """
+    if not image_filename:
+        return []
+    return [key for key in image_filename.split(",") if KEY_PATTERN.match(key)]
+
+
+def _pending_jobs():
+    """OCR jobs whose schedule, and so its references, doesn't exist yet."""
+    return OCRJob.query.filter(OCRJob.status.in_(("queued", "running")))
+
+
+class UploadStore:
+    """
+    Uploaded screenshots, stored once per distinct image.
+
+    Files are named by the SHA-256 of their content (first 40 hex digits)
+    plus the extension, and sharded two levels deep, e.g.
+    ab/cd/abcd1234....png. Two users uploading the same screenshot share
+    one file, and two different screenshots can never overwrite each other.
+
+    StoredUpload rows count how many schedules use each file. A file is
+    only deleted once nothing points to it and it hasn't been uploaded again
+    for grace_seconds, and never while a queued or running job names it.
+    """
+
+    def __init__(self, root, grace_seconds=600):
+        self.root = root
+        self.grace_seconds = grace_seconds
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def key_for(image_bytes, extension):
+        digest = hashlib.sha256(image_bytes).hexdigest()[:40]
+        return f"{digest}.{extension.lower()}"
+
+    def path_for(self, key):
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def put(self, image_bytes, extension):
+        """
+        Store an image if it isn't stored already. Returns its key.
+        """
+        key = self.key_for(image_bytes, extension)
+        path = self.path_for(key)
+
+        if os.path.exists(path):
+            # Already stored, restart its grace period
+            os.utime(path)
+            return key
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so nobody reads a half-written image
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(image_bytes)
+        os.replace(tmp_path, path)
+        return key
+
+    def add_refs(self, keys):
+        """
+        Count one more schedule using each key. Part of the caller's
+        transaction, nothing is committed here.
+        """
+        for key in keys:
+            updated = StoredUpload.query.filter_by(key=key).update(
+                {StoredUpload.refcount: StoredUpload.refcount + 1}
+            )
+            if updated:
+                continue
+
+            try:
+                # Another worker may insert the same key at the same moment
+                with db.session.begin_nested():
+                    db.session.add(
+                        StoredUpload(key=key, refcount=1, size_bytes=self._size(key))
+                    )
+            except IntegrityError:
+                StoredUpload.query.filter_by(key=key).update(
+                    {StoredUpload.refcount: StoredUpload.refcount + 1}
+                )
+
+    def release(self, keys):
+        """
+        Count one schedule fewer using each key, dropping the rows that reach
+        zero. Part of the caller's transaction. Returns the keys nothing
+        uses any more; pass them to discard() once the transaction commits.
+        """
+        unused = []
+        for key in keys:
+            StoredUpload.query.filter_by(key=key).update(
+                {StoredUpload.refcount: StoredUpload.refcount - 1}
+            )
+            if StoredUpload.query.filter(
+                StoredUpload.key == key, StoredUpload.refcount <= 0
+            ).delete():
+                unused.append(key)
+        return unused
+
+    def discard(self, keys):
+        """
+        Delete the files for keys nothing uses, unless they were uploaded
+        again within the grace period (collect_garbage gets those later).
+        """
+        in_use = {
+            row.key
+            for row in StoredUpload.query.filter(StoredUpload.key.in_(keys)).all()
+        }
+        cutoff = time.time() - self.grace_seconds
+
+        freed = 0
+        for key in keys:
+            if key in in_use:
+                continue
+            freed += self._remove_if_older(self.path_for(key), cutoff)
+        return freed
+
+    def abandon(self, keys):
+        """
+        Delete the files of an upload that was turned away before it became
+        a job, skipping the grace period. Files a schedule or a queued or
+        running job also names are kept.
+        """
+        freed = 0
+        for key in keys:
+            if StoredUpload.query.filter_by(key=key).first() is not None:
+                continue
+            pending = _pending_jobs().filter(
+                OCRJob.image_filename.contains(key)
+            ).first()
+            if pending is None:
+                freed += self._remove_if_older(self.path_for(key), float("inf"))
+        return freed
+
+    def collect_garbage(self, legacy_dir=None):
+        """
+        Delete stored files no Schedule.image_filename points to (once past
+        the grace period, and unless a queued or running job names them) and
+        rebuild the reference counts from the schedules table.
+
+        legacy_dir is the old flat uploads folder; screenshots saved there
+        by name are removed the same way once no schedule names them.
+
+        Returns a dict of what was kept and removed.
+        """
+        refcounts = {}
+        legacy_names = set()
+        for (image_filename,) in db.session.query(Schedule.image_filename):
+            for key in keys_from(image_filename):
+                refcounts[key] = refcounts.get(key, 0) + 1
+            if image_filename:
+                legacy_names.update(
+                    name.strip() for name in image_filename.split(",")
+                )
+
+        # The schedules these jobs will create are not in the table yet
+        pending_keys = set()
+        for (image_filename,) in _pending_jobs().with_entities(
+            OCRJob.image_filename
+        ):
+            pending_keys.update(keys_from(image_filename))
+
+        cutoff = time.time() - self.grace_seconds
+        stats = {"kept": 0, "removed": 0, "freed_bytes": 0, "legacy_removed": 0}
+
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if name in refcounts or name in pending_keys:
+                    stats["kept"] += 1
+                    continue
+                freed = self._remove_if_older(path, cutoff)
+                if freed:
+                    stats["removed"] += 1
+                    stats["freed_bytes"] += freed
+
+        if legacy_dir and os.path.isdir(legacy_dir):
+            for entry in os.scandir(legacy_dir):
+                if (
+                    not entry.is_file()
+                    or not entry.name.lower().endswith(LEGACY_EXTENSIONS)
+                    or entry.name in legacy_names
+                ):
+                    continue
+                freed = self._remove_if_older(entry.path, cutoff)
+                if freed:
+                    stats["legacy_removed"] += 1
+                    stats["freed_bytes"] += freed
+
+        # The schedules table is the source of truth for the counts
+        rows = {row.key: row for row in StoredUpload.query.all()}
+        for key, row in rows.items():
+            if key not in refcounts:
+                db.session.delete(row)
+            elif row.refcount != refcounts[key]:
+                row.refcount = refcounts[key]
+        for key, count in refcounts.items():
+            if key not in rows:
+                db.session.add(
+                    StoredUpload(key=key, refcount=count, size_bytes=self._size(key))
+                )
+        db.session.commit()
+
+        return stats
+
+    def stats(self):
+        files = 0
+        total_bytes = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                try:
+                    total_bytes += os.path.getsize(os.path.join(dirpath, name))
+                    files += 1
+                except FileNotFoundError:
+                    continue
+        return {"files": files, "bytes": total_bytes}
+
+    def _size(self, key):
+        try:
+            return os.path.getsize(self.path_for(key))
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _remove_if_older(path, cutoff):
+        """
+        Delete path if it was last written before cutoff. Returns the bytes
+        freed (0 if it was kept or already gone).
+        """
+        try:
+            stat = os.stat(path)
+            if stat.st_mtime >= cutoff:
+                return 0
+            os.remove(path)
+        except FileNotFoundError:
+            return 0
+        return stat.st_size